@@ -0,0 +1,94 @@
+"""Bankroll trajectories of a simulation run, written in chunks as a directory of Parquet files.
+
+    python simulation.py --turns 1000000 --bankrolls bankrolls --bankroll-every 100
+
+The run holds at most one chunk of values in memory, whatever its length.
+Each chunk is one Parquet file with a 'turn' column and a float64 column per
+agent, named bankrolls-<first turn in it>.parquet, so the run reads back in
+order with polars.scan_parquet(f"{path}/bankrolls-*.parquet"). Only files
+with that prefix are ever replaced, so the directory can hold other data.
+load_bankrolls() returns the run as one NumPy array per agent.
+"""
+import os
+import glob
+from array import array
+
+CHUNK_PREFIX = 'bankrolls-'  # Recorder chunks; nothing else in the directory is touched
+
+
+class BankrollRecorder:
+    """Writes every `every`-th turn's bankroll of each agent under path, a chunk of chunk_rows turns at a time.
+
+    start is the number of turns played before this recorder's first one, so
+    shards of one run keep the same global sampling stride and turn numbers.
+    """
+    def __init__(self, path, names, every=1, chunk_rows=65_536, start=0):
+        self.path = path
+        self.names = list(names)
+        self.every = every
+        self.chunk_rows = chunk_rows
+        self.turn = start
+        self.chunks = 0
+        self.turns = array('q')
+        self.columns = [array('d') for _ in self.names]
+        os.makedirs(path, exist_ok=True)
+        for stale in _chunk_files(path):  # A fresh run replaces the last one's trajectories
+            os.remove(stale)
+
+    def record(self, values):
+        """Adds one turn: a bankroll per agent, in the order of names."""
+        turn = self.turn
+        self.turn += 1
+        if turn % self.every:
+            return
+        self.turns.append(turn)
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        if len(self.turns) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        # An empty run still writes one empty chunk, so the agents' names survive
+        if not self.turns and self.chunks:
+            return
+        import polars
+        frame = polars.DataFrame(
+            [polars.Series('turn', self.turns, dtype=polars.Int64)]
+            + [polars.Series(name, column, dtype=polars.Float64) for name, column in zip(self.names, self.columns)])
+        first = self.turns[0] if self.turns else self.turn
+        frame.write_parquet(os.path.join(self.path, f"{CHUNK_PREFIX}{first:015d}.parquet"))
+        self.chunks += 1
+        self.turns = array('q')
+        self.columns = [array('d') for _ in self.names]
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _chunk_files(path):
+    return sorted(glob.glob(os.path.join(glob.escape(path), f"{CHUNK_PREFIX}*.parquet")))
+
+
+def load_bankrolls(path):
+    """Returns ({agent: float64 array of bankrolls}, int64 array of the turns they were recorded at)."""
+    import polars
+    frame = polars.scan_parquet(_chunk_files(path)).sort('turn').collect()
+    return {name: frame[name].to_numpy() for name in frame.columns if name != 'turn'}, frame['turn'].to_numpy()
+
+
+def concat_bankrolls(paths, path):
+    """Moves per-shard chunks, which are already numbered by global turn, into one directory for the whole run."""
+    os.makedirs(path, exist_ok=True)
+    for stale in _chunk_files(path):
+        os.remove(stale)
+    for part in paths:
+        for chunk in _chunk_files(part):
+            os.replace(chunk, os.path.join(path, os.path.basename(chunk)))
+        os.rmdir(part)
@@ -0,0 +1,188 @@
+import time
+import numpy as np
+from policy_table import compile_policy
+from cards import CARD_POINTS
+from shoe import DEFAULT_PENETRATION
+from simulation import RunningStats, money_summary
+
+# Card values per rank as the batch engine deals them (aces are stored as 11)
+CARD_VALUES = np.array(CARD_POINTS[::4], dtype=np.int8)
+START_MONEY = 1000  # Bankroll a player is reset to when they go broke
+
+
+class BatchShoe:
+    """One shuffled shoe per table, dealt through a per-table pointer.
+
+    Like shoe.Shoe, each table reshuffles between rounds once its cut card
+    (penetration of the way through) has come out, and on the spot if a round
+    runs it dry.
+    """
+    def __init__(self, num_tables, rng, num_decks=1, penetration=DEFAULT_PENETRATION):
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}")
+        self.rng = rng
+        self.base = np.tile(np.repeat(CARD_VALUES, 4), num_decks)
+        self.size = self.base.size
+        self.cut = max(1, int(self.size * penetration))
+        self.cards = self.rng.permuted(np.tile(self.base, (num_tables, 1)), axis=1)
+        self.ptr = np.zeros(num_tables, dtype=np.int64)
+
+    def shuffle(self, tables):
+        """Reshuffles a fresh shoe for the given tables."""
+        self.cards[tables] = self.rng.permuted(np.tile(self.base, (tables.size, 1)), axis=1)
+        self.ptr[tables] = 0
+
+    def shuffle_if_due(self, tables):
+        """Reshuffles the given tables whose cut card has come out."""
+        due = tables[self.ptr[tables] >= self.cut]
+        if due.size:
+            self.shuffle(due)
+
+    def draw(self, tables):
+        """Deals the next card at each of the given tables."""
+        empty = tables[self.ptr[tables] >= self.size]
+        if empty.size:
+            self.shuffle(empty)
+        cards = self.cards[tables, self.ptr[tables]]
+        self.ptr[tables] += 1
+        return cards
+
+
+def hand_totals(hard, aces):
+    """Returns (total, soft) arrays from hard totals (aces as 1) and ace flags."""
+    soft = aces & (hard + 10 <= 21)
+    return hard + 10 * soft, soft
+
+
+def simulate_blackjack_batch(players, num_turns=500, num_tables=1024, num_decks=1, seed=None, bankrolls=None,
+                             penetration=DEFAULT_PENETRATION):
+    """Plays num_turns rounds at num_tables independent tables at once.
+
+    Every table seats all players against one dealer, like simulate_blackjack,
+    and returns the same stats dict with counts summed over tables, the money
+    summary taken over the mean bankroll per turn (which a
+    bankrolls.BankrollRecorder records if given) and an extra 'hands_per_sec'
+    figure.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    shoe = BatchShoe(num_tables, rng, num_decks, penetration)
+    tables = np.arange(num_tables)
+    num_players = len(players)
+    # Agents never see a count here, so each plays its true-count 0 slice
+    policies = [(player.policy or compile_policy(player.agent, player.type)).hit_table() for player in players]
+    bets = np.array([player.bet for player in players], dtype=np.int64)[:, None]
+
+    money = np.array([[player.money] * num_tables for player in players], dtype=np.int64)
+    hard = np.zeros((num_players, num_tables), dtype=np.int16)
+    aces = np.zeros((num_players, num_tables), dtype=np.bool_)
+    num_cards = np.zeros((num_players, num_tables), dtype=np.int16)
+    bust = np.zeros((num_players, num_tables), dtype=np.bool_)
+    win_streak = np.zeros((num_players, num_tables), dtype=np.int64)
+    loss_streak = np.zeros((num_players, num_tables), dtype=np.int64)
+
+    totals = {name: np.zeros(num_players, dtype=np.int64) for name in
+              ['wins', 'busts', 'dealerwin', 'blackjacks', 'ties', 'restarts', 'hits', 'hand_value_sum']}
+    max_wins = np.zeros(num_players, dtype=np.int64)
+    max_losses = np.zeros(num_players, dtype=np.int64)
+    money_stats = [RunningStats() for _ in players]
+
+    def deal(p, idx):
+        cards = shoe.draw(idx)
+        hard[p, idx] += np.where(cards == 11, 1, cards)
+        aces[p, idx] |= cards == 11
+        num_cards[p, idx] += 1
+
+    for turn in range(num_turns):
+        broke = money <= 0
+        totals['restarts'] += broke.sum(axis=1)
+        money[broke] = START_MONEY
+
+        shoe.shuffle_if_due(tables)
+        dealer_up = shoe.draw(tables)
+        hard[:] = 0
+        aces[:] = False
+        num_cards[:] = 0
+        bust[:] = False
+        for p in range(num_players):
+            deal(p, tables)
+            deal(p, tables)
+
+        for p in range(num_players):
+            active = tables
+            while active.size:
+                total, soft = hand_totals(hard[p, active], aces[p, active])
+                hit = policies[p][total, soft.astype(np.int64), dealer_up[active]]
+                active = active[hit]
+                if not active.size:
+                    break
+                totals['hits'][p] += active.size
+                deal(p, active)
+                total, _ = hand_totals(hard[p, active], aces[p, active])
+                busted = active[total > 21]
+                bust[p, busted] = True
+                money[p, busted] -= bets[p, 0]
+                loss_streak[p, busted] += 1
+                win_streak[p, busted] = 0
+                active = active[total <= 21]
+            totals['busts'][p] += bust[p].sum()
+
+        dealer_hard = np.where(dealer_up == 11, 1, dealer_up).astype(np.int16)
+        dealer_aces = dealer_up == 11
+        dealer_total, _ = hand_totals(dealer_hard, dealer_aces)
+        drawing = tables[dealer_total < 17]
+        while drawing.size:
+            cards = shoe.draw(drawing)
+            dealer_hard[drawing] += np.where(cards == 11, 1, cards)
+            dealer_aces[drawing] |= cards == 11
+            dealer_total, _ = hand_totals(dealer_hard, dealer_aces)
+            drawing = tables[dealer_total < 17]
+
+        player_total, _ = hand_totals(hard, aces)
+        standing = ~bust
+        win = standing & ((dealer_total > 21) | (dealer_total < player_total))
+        lose = standing & ~win & (dealer_total > player_total)
+        tie = standing & ~win & ~lose
+
+        totals['hand_value_sum'] += np.where(standing, player_total, 0).sum(axis=1)
+        totals['blackjacks'] += (standing & (player_total == 21) & (num_cards == 2)).sum(axis=1)
+        totals['wins'] += win.sum(axis=1)
+        totals['dealerwin'] += lose.sum(axis=1)
+        totals['ties'] += tie.sum(axis=1)
+
+        money += np.where(win, bets, 0) - np.where(lose, bets, 0)
+        win_streak = np.where(win, win_streak + 1, np.where(lose, 0, win_streak))
+        loss_streak = np.where(lose, loss_streak + 1, np.where(win, 0, loss_streak))
+        max_wins = np.maximum(max_wins, win_streak.max(axis=1))
+        max_losses = np.maximum(max_losses, loss_streak.max(axis=1))
+
+        mean_money = money.mean(axis=1).tolist()
+        for running, value in zip(money_stats, mean_money):
+            running.add(value)
+        if bankrolls is not None:
+            bankrolls.record(mean_money)
+
+    elapsed = time.perf_counter() - start
+    hands = num_turns * num_tables
+    hands_per_sec = hands * num_players / max(elapsed, 1e-9)
+
+    stats = {}
+    for p, player in enumerate(players):
+        standing_hands = hands - totals['busts'][p]
+        stats[player.type] = {
+            'wins': int(totals['wins'][p]),
+            'busts': int(totals['busts'][p]),
+            'dealerwin': int(totals['dealerwin'][p]),
+            'turns': hands,
+            'blackjacks': int(totals['blackjacks'][p]),
+            'final_hand_values': float(totals['hand_value_sum'][p] / max(1, standing_hands)),
+            'game_durations': 1.0,
+            'consecutive_wins': int(max_wins[p]),
+            'consecutive_losses': int(max_losses[p]),
+            'ties': int(totals['ties'][p]),
+            'hit_stay_ratio': float(totals['hits'][p] / hands),
+            'restarts': int(totals['restarts'][p]),
+            **money_summary(money_stats[p]),
+            'hands_per_sec': hands_per_sec,
+        }
+    return stats
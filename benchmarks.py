@@ -0,0 +1,257 @@
+"""Speed benchmarks with a stored JSON baseline.
+
+    python benchmarks.py --save                  # measure everything and write the baseline
+    python benchmarks.py --compare               # measure and flag anything >20% slower than the baseline
+    python benchmarks.py --only sum_hand rules_decide --quick
+
+Each benchmark reports either a latency (lower is better) or a throughput
+(higher is better); --compare exits with status 1 if any regressed beyond
+--threshold.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BASE_DIR, "benchmarks_baseline.json")
+DEFAULT_THRESHOLD = 0.2  # Flag anything more than 20% slower than the baseline
+
+# name -> (function(scale) returning the measurement, unit, higher_is_better)
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, higher_is_better=False):
+    def register(func):
+        BENCHMARKS[name] = (func, unit, higher_is_better)
+        return func
+    return register
+
+
+def seconds_per_call(func, number, repeat=5):
+    """Best of repeat runs of number calls, per call (the minimum is the least noisy estimate)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Runs a benchmark inside a temporary directory so nothing it writes lands in the repo."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the progress bars and status prints of the code under test."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def sample_hands(count=64, seed=0):
+    from cards import DECK
+    rng = random.Random(seed)
+    return [rng.sample(DECK, rng.randint(2, 4)) for _ in range(count)]
+
+
+@benchmark('shoe_draw', 'ns/card')
+def bench_shoe_draw(scale):
+    from shoe import Shoe
+    random.seed(0)
+    shoe = Shoe(num_decks=6)
+    return seconds_per_call(shoe.draw, int(1_000_000 * scale)) * 1e9  # Includes the amortized reshuffles
+
+
+@benchmark('sum_hand', 'us/hand')
+def bench_sum_hand(scale):
+    from blackjack import sum_hand
+    hands = sample_hands()
+    return seconds_per_call(lambda: [sum_hand(hand) for hand in hands], int(2000 * scale)) / len(hands) * 1e6
+
+
+@benchmark('calculate_hand_value', 'us/hand')
+def bench_calculate_hand_value(scale):
+    from simulation import calculate_hand_value
+    hands = sample_hands()
+    return seconds_per_call(lambda: [calculate_hand_value(hand) for hand in hands], int(2000 * scale)) / len(hands) * 1e6
+
+
+@benchmark('rules_decide', 'us/decision')
+def bench_rules_decide(scale):
+    from rules_agent import RulesAgent
+    agent = RulesAgent()
+    return seconds_per_call(lambda: agent.decide(16, 10), int(100_000 * scale)) * 1e6
+
+
+@benchmark('ml_decision', 'us/decision')
+def bench_ml_decision(scale):
+    from ml_agent import MLAgent
+    agent = MLAgent()
+    agent.ml_decision(16, 10)  # Loads the model outside the timed loop
+    return seconds_per_call(lambda: agent.ml_decision(16, 10), int(10_000 * scale)) * 1e6
+
+
+@benchmark('rl_do_action', 'us/decision')
+def bench_rl_do_action(scale):
+    from blackjack_gym import BlackjackAgent
+    from simulation import calculate_hand_value
+    from cards import Hand, from_string
+    with quiet():
+        agent = BlackjackAgent()
+        agent.q_values
+    state = (Hand([from_string('10S'), from_string('6H')]), Hand([from_string('KD')]), False)
+    return seconds_per_call(lambda: agent.do_action(state, calculate_hand_value), int(20_000 * scale)) * 1e6
+
+
+@benchmark('simulate_blackjack', 'hands/sec', higher_is_better=True)
+def bench_simulate_blackjack(scale):
+    from simulation import Player, init_deck, simulate_blackjack
+    from rules_agent import RulesAgent
+    from blackjack_gym import BlackjackAgent
+    from ml_agent import MLAgent
+    num_turns = int(2000 * scale)
+    with scratch_dir(), quiet():
+        deck = init_deck()
+        players = [Player(BlackjackAgent(), deck, "rl"), Player(MLAgent(), deck, "ml"), Player(RulesAgent(), deck, "rule")]
+        players[0].agent.q_values, players[1].agent.model  # Loads the models outside the timed run
+        elapsed = seconds_per_call(lambda: simulate_blackjack(players, deck, num_turns), 1, repeat=3)
+    return num_turns * len(players) / elapsed
+
+
+@benchmark('train_agent', 'episodes/sec', higher_is_better=True)
+def bench_train_agent(scale):
+    import gymnasium as gym
+    from blackjack_gym import BlackjackAgent, train_agent
+    from model_store import ModelStore
+    n_episodes = int(5000 * scale)
+    with scratch_dir() as tmp, quiet():
+        agent = BlackjackAgent(store=ModelStore(tmp))
+        env = gym.make('Blackjack-v1', sab=False)
+        elapsed = seconds_per_call(lambda: train_agent(agent, env, n_episodes), 1, repeat=3)
+    return n_episodes / elapsed
+
+
+@benchmark('train_agent_vectorized', 'episodes/sec', higher_is_better=True)
+def bench_train_agent_vectorized(scale):
+    from blackjack_gym import BlackjackAgent, train_agent_vectorized
+    from model_store import ModelStore
+    n_episodes = int(500_000 * scale)
+    with scratch_dir() as tmp, quiet():
+        agent = BlackjackAgent(store=ModelStore(tmp))
+        elapsed = seconds_per_call(lambda: train_agent_vectorized(agent, n_episodes, seed=0), 1, repeat=3)
+    return n_episodes / elapsed
+
+
+def write_raw_csv(path, rows, seed=0):
+    """A synthetic raw dataset in the Kaggle CSV layout cleandata expects."""
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write('shoe_id,cards_remaining,dealer_up,initial_hand,dealer_final,dealer_final_value,'
+                'player_final,player_final_value,actions_taken,run_count,true_count,win\n')
+        for i in range(rows):
+            # The first row is a dealer blackjack so the value columns are read as strings, as in the real data
+            dealer = [11, 10] if i == 0 else [rng.randint(2, 11), rng.randint(2, 10)]
+            player = [rng.randint(2, 11), rng.randint(2, 10)]
+            dealer_value = 'BJ' if sum(dealer) == 21 else sum(dealer)
+            player_value = 'BJ' if sum(player) == 21 else sum(player)
+            actions = rng.choice(["[['S']]", "[['H', 'S']]", "[['H', 'H', 'S']]", "[['D']]"])
+            f.write(f'{i // 50},{416 - i % 50 * 6},{dealer[0]},"{player}","{dealer}",{dealer_value},'
+                    f'"[{player}]","[{player_value}]","{actions}",{rng.randint(-8, 8)},{rng.randint(-3, 3)},'
+                    f'{rng.choice([-1.0, 0.0, 1.0, 1.5])}\n')
+
+
+@benchmark('cleandata', 'rows/sec', higher_is_better=True)
+def bench_cleandata(scale):
+    import cleandata
+    rows = int(200_000 * scale)
+    with scratch_dir(), quiet():
+        write_raw_csv(cleandata.RAW_CSV, rows)
+        elapsed = seconds_per_call(lambda: cleandata.clean_data(cleandata.RAW_CSV), 1, repeat=3)
+    return rows / elapsed
+
+
+def run(names=None, scale=1.0):
+    results = {}
+    for name in names or BENCHMARKS:
+        func, unit, higher_is_better = BENCHMARKS[name]
+        value = func(scale)
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+        print(f"{name:<24} {value:>14,.2f} {unit}")
+    return results
+
+
+def save_baseline(results, path=BASELINE):
+    record = {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Prints each benchmark against the baseline; returns the names that slowed down beyond threshold."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<24} (not in baseline)")
+            continue
+        # Slowdown as a fraction: positive means slower, whichever direction the unit improves in
+        if result['higher_is_better']:
+            slowdown = base['value'] / result['value'] - 1
+        else:
+            slowdown = result['value'] / base['value'] - 1
+        flag = ""
+        if slowdown > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<24} {base['value']:>14,.2f} -> {result['value']:>14,.2f} {result['unit']:<12} {-slowdown:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the speed of the hot paths and compare against a baseline")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run just these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the iterations")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare the results against the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown fraction that counts as a regression")
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; run python benchmarks.py --save first")
+
+    results = run(args.only, 0.1 if args.quick else 1.0)
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.baseline}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower: {', '.join(regressions)}")
+            sys.exit(1)
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,11 @@
-import os
-import random
-import copy
-import joblib  # For loading ML model
 import numpy as np
 from rules_agent import RulesAgent
-import pandas as pd
+from ml_agent import predict_actions, load_ml_model
+from cards import CARD_POINTS, Hand, describe, hand_total
+from shoe import Shoe
 
-# Load the trained ML model
-ml_model = joblib.load("blackjack_model.pkl")
+# Trained ML model, loaded on the first ML decision
+ml_model = None
 
 class Player:
     """Base class for any Blackjack player."""
@@ -15,7 +13,7 @@ class Player:
         self.name = name
         self.player_type = player_type  # 'human', 'ml', or 'rule'
         self.money = money
-        self.hand = []
+        self.hand = Hand()
         self.bet = 0
 
     def place_bet(self):
@@ -40,21 +38,27 @@ class Player:
 
     def reset_hand(self):
         """Clears the player's hand for a new round."""
-        self.hand = []
+        self.hand = Hand()
 
 def ml_decision(player_total, dealer_card, true_count):
     """Predicts whether to hit (1) or stand (0) based on trained ML model."""
-    input_data = pd.DataFrame([[player_total, dealer_card, true_count]], 
-                              columns=['player_final_value', 'dealer_up', 'true_count'])
-    return ml_model.predict(input_data)[0]  # ML decides 1 (Hit) or 0 (Stand)
-
-def play(deck, players):
-    """Handles a full round of Blackjack."""
-    deck_list = list(deck.keys())
-
-    rules_agent = RulesAgent()
-
-    while any(player.money > 0 for player in players) and len(deck) >= 10:
+    return decide_batch([player_total], [dealer_card], [true_count])[0]  # ML decides 1 (Hit) or 0 (Stand)
+
+def decide_batch(player_totals, dealer_cards, true_counts):
+    """Predicts hit (1) / stand (0) for arrays of states with a single model call."""
+    global ml_model
+    if ml_model is None:
+        ml_model = load_ml_model()
+    return predict_actions(ml_model, player_totals, dealer_cards, true_counts)
+
+def play(shoe, players):
+    """Plays rounds of Blackjack from the shoe until every player is out of money."""
+    rules_agent = RulesAgent(shoe.num_decks)
+
+    while any(player.money > 0 for player in players):
+        if shoe.shuffle_if_due():
+            print("\nCut card reached. Reshuffling the shoe...")
+            rules_agent.counter.reset()
         print("\nStarting a new round...\n")
         
         # Each player places their bet
@@ -64,19 +68,19 @@ def play(deck, players):
                 if not player.place_bet():
                     players.remove(player)
 
-        dealer_hand = []
+        dealer_hand = Hand()
 
         # Initial dealing
         for player in players:
-            deal_card(player.hand, deck, deck_list)
-            deal_card(player.hand, deck, deck_list)
+            deal_card(player.hand, shoe, rules_agent.counter)
+            deal_card(player.hand, shoe, rules_agent.counter)
 
-        deal_card(dealer_hand, deck, deck_list)
-        deal_card(dealer_hand, deck, deck_list)
+        deal_card(dealer_hand, shoe, rules_agent.counter)
+        deal_card(dealer_hand, shoe, rules_agent.counter)
 
         rules_agent.update_count(dealer_hand[0])
 
-        print(f"\nDealer is showing {dealer_hand[0][1][0]} of {dealer_hand[0][1][1]}")
+        print(f"\nDealer is showing {describe(dealer_hand[0])}")
 
         # Players' turns
         for player in players:
@@ -89,15 +93,15 @@ def play(deck, players):
                     action = input("Would you like to (h)it or (s)tand? ").lower()
                 elif player.player_type == "ml":
                     true_count = rules_agent.get_true_count()
-                    action = 'h' if ml_decision(player_total, dealer_hand[0][0], true_count) == 1 else 's'
+                    action = 'h' if ml_decision(player_total, CARD_POINTS[dealer_hand[0]], true_count) == 1 else 's'
                 elif player.player_type == "rule":
-                    action = 'h' if rules_agent.decide(player_total, dealer_hand[0][0]) == 1 else 's'
+                    action = 'h' if rules_agent.decide(player_total, CARD_POINTS[dealer_hand[0]], player.hand.soft) == 1 else 's'
 
                 if action == "h":
-                    pc_val = deal_card(player.hand, deck, deck_list)
+                    pc_val = deal_card(player.hand, shoe, rules_agent.counter)
                     rules_agent.update_count(pc_val)
                     player_total = sum_hand(player.hand)
-                    print(f"{player.name} drew {player.hand[-1][1][0]} of {player.hand[-1][1][1]}. Total: {player_total}.")
+                    print(f"{player.name} drew {describe(player.hand[-1])}. Total: {player_total}.")
                 elif action == "s":
                     print(f"{player.name} stands with total {player_total}.")
                     break
@@ -109,13 +113,13 @@ def play(deck, players):
                 continue
 
         # Dealer's Turn (Hits until 17+)
-        print(f"\nDealer's hidden card was {dealer_hand[1][1][0]} of {dealer_hand[1][1][1]}.")
+        print(f"\nDealer's hidden card was {describe(dealer_hand[1])}.")
         dealer_total = sum_hand(dealer_hand)
         while dealer_total < 17:
-            dc_val = deal_card(dealer_hand, deck, deck_list)
+            dc_val = deal_card(dealer_hand, shoe, rules_agent.counter)
             rules_agent.update_count(dc_val)
             dealer_total = sum_hand(dealer_hand)
-            print(f"Dealer drew {dealer_hand[-1][1][0]} of {dealer_hand[-1][1][1]}. Dealer total: {dealer_total}.")
+            print(f"Dealer drew {describe(dealer_hand[-1])}. Dealer total: {dealer_total}.")
 
         # Determine Winners
         for player in players:
@@ -135,48 +139,27 @@ def play(deck, players):
 
 def sum_hand(hand):
     """Calculates the total value of a hand."""
-    value = 0
-    ace_count = 0
-    for card in hand:
-        rank = card[0]
-        if isinstance(rank, tuple):  # If it's an Ace
-            value += 11
-            ace_count += 1
-        elif isinstance(rank, int):
-            value += rank
-    while value > 21 and ace_count > 0:
-        value -= 10  # Convert an Ace from 11 → 1
-        ace_count -= 1
-    return value
-
-def deal_card(hand, deck, deck_list):
-    """Deals a single card."""
-    if deck_list:
-        card_key = deck_list.pop()
-        card = deck.pop(card_key)
-        hand.append(card)
-        return card
-
-def shuffle(deck):
-    """Shuffles the deck."""
-    tempdeck = copy.deepcopy(deck)
-    shuffled_keys = list(tempdeck.keys())
-    random.shuffle(shuffled_keys)
-    return {key: tempdeck[key] for key in shuffled_keys}
+    if isinstance(hand, Hand):
+        return hand.total  # Kept up to date as cards are dealt
+    return hand_total(hand)
+
+def deal_card(hand, shoe, counter=None):
+    """Deals a single card; if the shoe ran out and reshuffled for it, the counter starts over."""
+    shuffles = shoe.shuffles
+    card = shoe.draw()
+    if shoe.shuffles != shuffles:
+        print("\nThe shoe ran out. Reshuffling...")
+        if counter is not None:
+            counter.reset()
+    hand.append(card)
+    return card
 
 def format_hand(hand):
     """Formats a hand for printing."""
-    return ', '.join([f"{card[1][0]} of {card[1][1]}" for card in hand])
+    return ', '.join([describe(card) for card in hand])
 
 if __name__ == "__main__":
-    foldername = os.listdir("Card PNGs")
-    deck = {}
-    for fil in foldername:
-        fullcard = fil.replace(".png", "").split("_of_")
-        name = fullcard[0] + "_" + fullcard[1]
-        deck[name] = [(10) if fullcard[0] in ["jack", "queen", "king"] else (11) if fullcard[0] == "ace" else int(fullcard[0]), fullcard]
-
-    shuffled_deck = shuffle(deck)
+    shoe = Shoe(num_decks=1)
 
     # Define players (human, ML agent, and rule-based agent)
     players = [
@@ -185,4 +168,4 @@ if __name__ == "__main__":
         Player("Rule-Based Agent", "rule")
     ]
 
-    play(shuffled_deck, players)
+    play(shoe, players)
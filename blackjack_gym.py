@@ -1,15 +1,30 @@
 import gymnasium as gym
-from collections import defaultdict
+import os
 import numpy as np
-import matplotlib.pyplot as plt
 import pickle
-from tqdm import tqdm
+from q_table import QTable
+from model_store import ModelStore, BASE_DIR
+from training_telemetry import TrainingTelemetry
+from cards import CARD_POINTS, Hand
+
+Q_VALUES_MODEL = "q_values"  # Name of the Q-table in the model store
+# Q-tables shipped with the repo, used until the model store has a version
+LEGACY_Q_TABLE = os.path.join(BASE_DIR, "blackjack_q_values.npy")
+LEGACY_Q_VALUES = os.path.join(BASE_DIR, "blackjack_q_values.pkl")  # Pickled {obs: action values} dict
+
+def observation(player_total, soft, dealer_value):
+    """The gym observation for a table state: (player total, dealer upcard with an ace as 1, usable ace).
+
+    Live play and compiled policy tables both encode states through this, so
+    they read the same Q-table entries the agent was trained on.
+    """
+    return player_total, 1 if dealer_value == 11 else dealer_value, soft
+
 
 class BlackjackAgent:
-    def __init__(self, discount_factor=0.95):
+    def __init__(self, discount_factor=0.95, store=None):
         # Hyperparameters
         learning_rate = 0.01
-        n_episodes = 100_000
         initial_epsilon = 1.0
         epsilon_decay = 0.9995  # Improved smooth decay
         final_epsilon = 0.1
@@ -18,24 +33,30 @@ class BlackjackAgent:
         env = gym.wrappers.RecordEpisodeStatistics(env)
         
         self.env = env
-        self.q_values = defaultdict(lambda: np.zeros(env.action_space.n))
+        self.store = store or ModelStore()
+        self._q_values = None  # Loaded from the model store on first use
+        self.episodes_trained = 0
         self.lr = learning_rate
         self.discount_factor = discount_factor
         self.epsilon = initial_epsilon
         self.epsilon_decay = epsilon_decay
         self.final_epsilon = final_epsilon
-        self.training_error = []
-
-        # Train the agent
-        try:
-            self.load_model()
-            print("Loaded existing Q-values successfully!")
-        except FileNotFoundError:
-            print("No saved model found. Training from scratch...")
-            train_agent(self, self.env, n_episodes)
-            plot_training(self)
-
-
+        self.telemetry = TrainingTelemetry()  # Constant-memory TD error, return and speed statistics
+
+    @property
+    def q_values(self):
+        if self._q_values is None:
+            try:
+                self.load_model()
+                print("Loaded existing Q-values successfully!")
+            except FileNotFoundError:
+                print("No saved model found. Run `python blackjack_gym.py train` to train one; using an empty Q-table.")
+                self._q_values = QTable()
+        return self._q_values
+
+    @q_values.setter
+    def q_values(self, table):
+        self._q_values = table
 
     def get_action(self, obs, training=True):
         if training and np.random.random() < self.epsilon:
@@ -46,18 +67,43 @@ class BlackjackAgent:
         future_q_value = (not terminated) * np.max(self.q_values[next_obs])
         temporal_difference = reward + self.discount_factor * future_q_value - self.q_values[obs][action]
         self.q_values[obs][action] += self.lr * temporal_difference
-        self.training_error.append(temporal_difference)
+        self.telemetry.record_td(temporal_difference)
 
     def decay_epsilon(self):
         self.epsilon = max(self.final_epsilon, self.epsilon * self.epsilon_decay)
 
-    def save_model(self, filename="blackjack_q_values.pkl"):
-        with open(filename, 'wb') as f:
-            pickle.dump(dict(self.q_values), f)
-
-    def load_model(self, filename="blackjack_q_values.pkl"):
-        with open(filename, 'rb') as f:
-            self.q_values = defaultdict(lambda: np.zeros(self.env.action_space.n), pickle.load(f))
+    def save_model(self, filename=None):
+        """Saves the Q-table as a new model-store version, or to filename if one is given."""
+        if filename is not None:
+            self.q_values.save(filename)
+            return
+        self.store.save(Q_VALUES_MODEL, self.q_values.save, "q_values.npy", {
+            'episodes_trained': self.episodes_trained,
+            'epsilon': self.epsilon,
+            'learning_rate': self.lr,
+            'discount_factor': self.discount_factor,
+        })
+
+    def load_model(self, filename=None, mmap=True):
+        """Memory-maps the latest Q-table read-only and restores its training progress.
+
+        Without a filename this is the latest model-store version, falling back
+        to the table shipped with the repo (converted from the legacy pickle if
+        that is all there is).
+        """
+        if filename is None:
+            filename = self.store.artifact_path(Q_VALUES_MODEL)
+            if filename is not None:
+                metadata = self.store.metadata(Q_VALUES_MODEL)
+                self.episodes_trained = metadata.get('episodes_trained', 0)
+                self.epsilon = metadata.get('epsilon', self.epsilon)
+            else:
+                filename = LEGACY_Q_TABLE
+        if not os.path.exists(filename) and os.path.exists(LEGACY_Q_VALUES):
+            with open(LEGACY_Q_VALUES, 'rb') as f:
+                QTable.from_dict(pickle.load(f)).save(filename)
+        self.q_values = QTable.load(filename, mmap=mmap)
+        self.telemetry.resume(self.episodes_trained)  # Snapshots carry on from the checkpoint's episode count
 
     def set_state(self, env, custom_state):
         player_cards, dealer_cards, usable_ace = custom_state
@@ -69,53 +115,162 @@ class BlackjackAgent:
 
     
     
-    def map_cards_to_values(self,cards):
-        """Converts a list of card strings (e.g., ['5S', '6C']) to their numeric values."""
-        def map_card_to_value(card):
-            """Maps card strings (e.g., '7S', '5C', 'JS', 'QS') to their numeric values."""
-            face_card_values = {'J': 10, 'Q': 10, 'K': 10, 'A': 11}  # Blackjack values
-            value = card[:-1]  # Extract the value part
-            return int(value) if value.isdigit() else face_card_values[value]
-        return [map_card_to_value(card) for card in cards]
- 
-    def do_action(self, custom_state, calculate_total, max_steps=10):
-        new_custom_state = (self.map_cards_to_values(custom_state[0]), self.map_cards_to_values(custom_state[1]), custom_state[2])
-        
-        self.set_state(self.env, new_custom_state)
-
-        # player_total = calculate_total(custom_state[0])
-        # dealer_total = calculate_total(custom_state[1])
-        # obs = (player_total,dealer_total,custom_state[2]) 
-        calculateTotal = lambda hand: sum([card for card in hand])
-        player_total = calculateTotal(new_custom_state[0])
-        dealer_total = calculateTotal(new_custom_state[1])
-        obs = (player_total,dealer_total,new_custom_state[2]) 
-        # print(obs)
+    def map_cards_to_values(self, cards):
+        """Converts a list of card codes to their numeric values (aces as 11)."""
+        return [CARD_POINTS[card] for card in cards]
 
+    def do_action(self, custom_state, calculate_total, max_steps=10):
+        player_hand, dealer_hand, usable_ace = custom_state
+        player_hand = player_hand if isinstance(player_hand, Hand) else Hand(player_hand)
+        dealer_hand = dealer_hand if isinstance(dealer_hand, Hand) else Hand(dealer_hand)
 
-        # print(f"Starting from state: {new_custom_state}")
-        
-        action = self.get_action(obs, training=False)
-        return action
-
+        self.set_state(self.env, (self.map_cards_to_values(player_hand), self.map_cards_to_values(dealer_hand), usable_ace))
 
+        # Totals and softness are kept by the hands instead of re-added per decision
+        return self.get_action(observation(player_hand.total, player_hand.soft, dealer_hand.total), training=False)
 
 
 def train_agent(agent, env, n_episodes):
+    from tqdm import tqdm
+
+    agent.q_values = agent.q_values.copy()  # Loaded tables are read-only memory maps
     for episode in tqdm(range(n_episodes)):
         obs, info = env.reset()
         done = False
+        episode_return = 0
         while not done:
             action = agent.get_action(obs, training=True)
             next_obs, reward, terminated, truncated, info = env.step(action)
             agent.update(obs, action, reward, terminated, next_obs)
             done = terminated or truncated
             obs = next_obs
+            episode_return += reward
         agent.decay_epsilon()
+        agent.episodes_trained += 1
+        agent.telemetry.record_episodes(episode_return, agent.epsilon)
     agent.save_model()  # Save trained model automatically
 
 
-def test_agent(agent, env, n_episodes=1000):
+# Blackjack-v1 draws from an infinite deck; face cards count as 10 and aces as 1
+GYM_DECK = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10])
+
+
+def _hand_sums(sums, aces):
+    """Blackjack-v1 hand value and usable-ace flag from raw sums (aces as 1) and ace flags."""
+    usable = aces & (sums + 10 <= 21)
+    return sums + 10 * usable, usable
+
+
+def train_agent_vectorized(agent, n_episodes, batch_size=4096, seed=None):
+    """Trains on batch_size Blackjack-v1 episodes at a time in lockstep as NumPy arrays.
+
+    Follows the same rules (sab=False, no natural bonus), observations and
+    TD update as train_agent, with the updates of each lockstep applied
+    together. Epsilon follows the same per-episode schedule: the i-th episode
+    of a batch explores with the epsilon train_agent would use for it, so
+    the schedule does not depend on batch_size.
+    """
+    rng = np.random.default_rng(seed)
+    q = agent.q_values.copy().values
+
+    episodes_done = 0
+    while episodes_done < n_episodes:
+        n = min(batch_size, n_episodes - episodes_done)
+        cards = GYM_DECK[rng.integers(0, 13, size=(n, 3))]
+        player_raw = cards[:, 0] + cards[:, 1]
+        player_aces = (cards[:, 0] == 1) | (cards[:, 1] == 1)
+        dealer_card = cards[:, 2]
+        player_sum, usable = _hand_sums(player_raw, player_aces)
+        epsilon = np.maximum(agent.final_epsilon, agent.epsilon * agent.epsilon_decay ** np.arange(n))
+
+        active = np.arange(n)
+        finished_returns = []
+        while active.size:
+            p, d, u = player_sum[active], dealer_card[active], usable[active].astype(np.int64)
+            greedy = np.argmax(q[p, d, u], axis=1)
+            explore = rng.random(active.size) < epsilon[active]
+            action = np.where(explore, rng.integers(0, 2, size=active.size), greedy)
+
+            # Hit: draw a card, bust ends the episode with -1
+            drawn = GYM_DECK[rng.integers(0, 13, size=active.size)]
+            hit = action == 1
+            player_raw[active[hit]] += drawn[hit]
+            player_aces[active[hit]] |= drawn[hit] == 1
+            next_sum, next_usable = _hand_sums(player_raw[active], player_aces[active])
+            busted = hit & (next_sum > 21)
+
+            # Stick: the dealer plays out from the upcard plus a hidden card
+            reward = np.where(busted, -1.0, 0.0)
+            stick = np.flatnonzero(~hit)
+            if stick.size:
+                upcard = dealer_card[active[stick]]
+                hidden = GYM_DECK[rng.integers(0, 13, size=stick.size)]
+                dealer_raw = upcard + hidden
+                dealer_aces = (upcard == 1) | (hidden == 1)
+                dealer_sum, _ = _hand_sums(dealer_raw, dealer_aces)
+                drawing = np.flatnonzero(dealer_sum < 17)
+                while drawing.size:
+                    card = GYM_DECK[rng.integers(0, 13, size=drawing.size)]
+                    dealer_raw[drawing] += card
+                    dealer_aces[drawing] |= card == 1
+                    dealer_sum, _ = _hand_sums(dealer_raw, dealer_aces)
+                    drawing = np.flatnonzero(dealer_sum < 17)
+                player_score = next_sum[stick]
+                dealer_score = np.where(dealer_sum > 21, 0, dealer_sum)
+                reward[stick] = np.sign(player_score - dealer_score)
+
+            terminated = busted | ~hit
+            future_q_value = np.where(terminated, 0.0, q[next_sum, d, next_usable.astype(np.int64)].max(axis=1))
+            temporal_difference = reward + agent.discount_factor * future_q_value - q[p, d, u, action]
+            np.add.at(q, (p, d, u, action), agent.lr * temporal_difference)
+            agent.telemetry.record_td(temporal_difference)
+
+            player_sum[active], usable[active] = next_sum, next_usable
+            active = active[~terminated]
+            finished_returns.append(reward[terminated])  # Only the last step of an episode is rewarded
+
+        episodes_done += n
+        agent.episodes_trained += n
+        agent.epsilon = max(agent.final_epsilon, agent.epsilon * agent.epsilon_decay ** n)
+        agent.telemetry.record_episodes(np.concatenate(finished_returns), agent.epsilon)
+
+    agent.q_values = QTable(q)
+    agent.save_model()  # Save trained model automatically
+
+
+def train_job(n_episodes=100_000, checkpoint_every=25_000, resume=True, seed=None, store=None, telemetry_path=None):
+    """Trains until the agent has seen n_episodes in total, saving a model-store version per chunk.
+
+    With resume, training warm-starts from the latest saved version, so
+    rerunning an interrupted job picks up from its last checkpoint.
+    """
+    agent = BlackjackAgent(store=store)
+    agent.telemetry.snapshot_path = telemetry_path
+    if not resume:
+        agent.q_values = QTable()
+    elif agent.store.latest_version(Q_VALUES_MODEL) is not None:
+        agent.load_model()
+        print(f"Resuming from {agent.episodes_trained} trained episodes.")
+
+    while agent.episodes_trained < n_episodes:
+        chunk = min(checkpoint_every, n_episodes - agent.episodes_trained)
+        chunk_seed = None if seed is None else seed + agent.episodes_trained
+        train_agent_vectorized(agent, chunk, seed=chunk_seed)
+        print(f"Checkpoint saved after {agent.episodes_trained} episodes.")
+    return agent
+
+
+def test_agent(agent, env, n_episodes=1000, precision=None):
+    """Average return of the greedy policy over n_episodes.
+
+    With precision set, episodes are instead played in chunks until the
+    average is known to within +-precision (95% confidence), with n_episodes
+    as the cap.
+    """
+    if precision is not None:
+        from sequential_evaluation import SequentialEvaluator, evaluate_returns, gym_episode_returns
+        evaluator = SequentialEvaluator(precision, chunk=min(1000, n_episodes), max_hands=n_episodes)
+        return evaluate_returns(gym_episode_returns(agent, env), evaluator, 'rl')['agents']['rl']['ev']
     rewards = []
     for _ in range(n_episodes):
         obs, info = env.reset()
@@ -144,12 +299,13 @@ def visualize_blackjack(env, agent, episodes=5):
         print(f"Final Reward: {reward}\n")
 
 
-def plot_training(agent, rolling_length=500):
-    def get_moving_avgs(arr, window):
-        return np.convolve(np.array(arr).flatten(), np.ones(window), mode='valid') / window
+def plot_training(agent):
+    import matplotlib.pyplot as plt
 
+    telemetry = agent.telemetry
     plt.figure(figsize=(8, 5))
-    plt.plot(get_moving_avgs(agent.training_error, rolling_length), label="Training Error")
+    plt.plot(telemetry.history_episodes.values(), telemetry.history_td.values(),
+             label=f"Training Error (rolling mean of {telemetry.td_window.capacity})")
     plt.title("Training Error Over Episodes")
     plt.xlabel("Episodes")
     plt.ylabel("Error")
@@ -192,20 +348,11 @@ def main():
 
     env = gym.make("Blackjack-v1", sab=False)
     env = gym.wrappers.RecordEpisodeStatistics(env)
-    agent = BlackjackAgent()
-
-    # Train the agent
-    try:
-        agent.load_model()
-        print("Loaded existing Q-values successfully!")
-    except FileNotFoundError:
-        print("No saved model found. Training from scratch...")
-        train_agent(agent, env, n_episodes)
-        plot_training(agent)
+    agent = BlackjackAgent()  # Loads the latest trained Q-table; train with `python blackjack_gym.py train`
 
-    # Test the agent
-    test_reward = test_agent(agent, env)
-    print(f"Average reward over 1000 test games: {test_reward}")
+    # Test the agent until its average reward is known to +-0.02
+    from sequential_evaluation import SequentialEvaluator, evaluate_returns, gym_episode_returns, print_summary
+    print_summary(evaluate_returns(gym_episode_returns(agent, env), SequentialEvaluator(0.02, chunk=1000), 'rl'))
 
     # Visualize some episodes
     visualize_blackjack(env, agent, episodes=5)
@@ -217,3 +364,23 @@ def main():
     test_from_custom_state(agent, env, custom_state)
 
 
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train or try out the Q-learning blackjack agent.")
+    commands = parser.add_subparsers(dest="command")
+    train = commands.add_parser("train", help="Train the agent and save versions to the model store")
+    train.add_argument("--episodes", type=int, default=100_000, help="Total episodes the agent should have trained on")
+    train.add_argument("--checkpoint-every", type=int, default=25_000)
+    train.add_argument("--fresh", action="store_true", help="Start from an empty Q-table instead of the latest version")
+    train.add_argument("--seed", type=int, default=None)
+    train.add_argument("--plot", action="store_true", help="Plot the training error when done")
+    train.add_argument("--telemetry", default=None, help="Append training telemetry snapshots to this file")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        agent = train_job(args.episodes, args.checkpoint_every, not args.fresh, args.seed, telemetry_path=args.telemetry)
+        if args.plot:
+            plot_training(agent)
+    else:
+        main()
@@ -0,0 +1,59 @@
+from collections import Counter
+from cards import COUNT_RANK
+
+RANKS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 'jack', 'queen', 'king', 'ace']
+HIGH_CARDS = {10, 'jack', 'queen', 'king', 'ace'}
+LOW_CARDS = {2, 3, 4, 5, 6}
+
+# Tag values per card for each supported count system
+COUNT_SYSTEMS = {
+    'hi-lo': {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 0, 8: 0, 9: 0, 10: -1, 'ace': -1},
+    'ko': {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 1, 8: 0, 9: 0, 10: -1, 'ace': -1},
+    'omega-ii': {2: 1, 3: 1, 4: 2, 5: 2, 6: 2, 7: 1, 8: 0, 9: -1, 10: -2, 'ace': 0},
+}
+for tags in COUNT_SYSTEMS.values():
+    tags.update({'jack': tags[10], 'queen': tags[10], 'king': tags[10]})
+
+
+def card_rank(card):
+    """The rank of a card code as counted here, with number cards as ints."""
+    return COUNT_RANK[card]
+
+
+class CardCounter:
+    """Running count, remaining cards and high/low tallies, each updated in O(1) per dealt card."""
+    def __init__(self, num_decks=1, system='hi-lo'):
+        if system not in COUNT_SYSTEMS:
+            raise ValueError(f"Unknown count system: {system}")
+        self.num_decks = num_decks
+        self.system = system
+        self.tags = COUNT_SYSTEMS[system]
+        self.reset()
+
+    def reset(self):
+        """Starts counting a freshly shuffled shoe."""
+        self.remaining = Counter({rank: 4 * self.num_decks for rank in RANKS})
+        self.cards_remaining = 52 * self.num_decks
+        self.high_remaining = 4 * len(HIGH_CARDS) * self.num_decks
+        self.low_remaining = 4 * len(LOW_CARDS) * self.num_decks
+        # KO is unbalanced, so it starts from its standard initial running count
+        self.running_count = 4 - 4 * self.num_decks if self.system == 'ko' else 0
+        self.seen_cards = 0
+
+    def deal(self, rank):
+        """Records one dealt card."""
+        self.seen_cards += 1
+        if self.remaining[rank] <= 0:
+            return
+        self.remaining[rank] -= 1
+        self.cards_remaining -= 1
+        self.running_count += self.tags[rank]
+        if rank in LOW_CARDS:
+            self.low_remaining -= 1
+        elif rank in HIGH_CARDS:
+            self.high_remaining -= 1
+
+    def true_count(self):
+        """Running count per remaining deck (never dividing by less than one deck)."""
+        remaining_decks = max(self.cards_remaining / 52, 1)
+        return self.running_count / remaining_decks
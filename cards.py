@@ -0,0 +1,110 @@
+"""Compact card encoding shared by the game loops, the simulators and the agents.
+
+A card is a small integer, rank * 4 + suit (0-51), so a hand or a shoe fits in
+an int8 array. Everything a hand evaluation needs is a lookup in a table
+indexed by that integer, with no string parsing or dict construction.
+"""
+
+RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+SUITS = ('S', 'H', 'D', 'C')
+RANK_NAMES = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'jack', 'queen', 'king', 'ace')  # As in the card image files
+SUIT_NAMES = ('spades', 'hearts', 'diamonds', 'clubs')
+DECK = tuple(range(len(RANKS) * len(SUITS)))
+ACE = RANKS.index('A')
+
+# Per-card lookup tables, indexed by the card code
+HARD_VALUE = tuple(1 if code // 4 == ACE else min(code // 4 + 2, 10) for code in DECK)  # Aces as 1
+CARD_POINTS = tuple(11 if code // 4 == ACE else value for code, value in zip(DECK, HARD_VALUE))  # Aces as 11
+IS_ACE = tuple(code // 4 == ACE for code in DECK)
+COUNT_RANK = tuple(int(RANK_NAMES[code // 4]) if code // 4 < 9 else RANK_NAMES[code // 4] for code in DECK)  # CardCounter ranks
+IMAGE_NAME = tuple(f"{RANK_NAMES[code // 4]}_of_{SUIT_NAMES[code % 4]}" for code in DECK)
+
+# (total, soft) for every non-busting hard total, indexed by hard * 2 + has_ace
+HAND_TOTALS = tuple((hard + 10, True) if ace and hard <= 11 else (hard, False)
+                    for hard in range(22) for ace in (0, 1))
+
+
+def encode(rank, suit):
+    """Card code from a rank ('Q' or 'queen') and a suit ('S' or 'spades')."""
+    rank_index = RANKS.index(rank) if rank in RANKS else RANK_NAMES.index(rank)
+    suit_index = SUITS.index(suit) if suit in SUITS else SUIT_NAMES.index(suit)
+    return rank_index * 4 + suit_index
+
+
+def from_string(card):
+    """Card code from a 'QS'-style string."""
+    return encode(card[:-1], card[-1])
+
+
+def to_string(card):
+    return RANKS[card // 4] + SUITS[card % 4]
+
+
+def describe(card):
+    """Human-readable name, e.g. 'queen of spades'."""
+    return f"{RANK_NAMES[card // 4]} of {SUIT_NAMES[card % 4]}"
+
+
+def hand_value(hand):
+    """Returns the hand's total and whether an ace is still counted as 11."""
+    hard = 0
+    ace = 0
+    for card in hand:
+        hard += HARD_VALUE[card]
+        ace |= IS_ACE[card]
+    if hard > 21:
+        return hard, False
+    return HAND_TOTALS[hard * 2 + ace]
+
+
+def hand_total(hand):
+    return hand_value(hand)[0]
+
+
+class Hand:
+    """Cards held plus a running hard total, ace count and blackjack flag, updated in O(1) per card.
+
+    Behaves like the card list it replaces (iteration, indexing, len, append),
+    so the game loops, renderers and agents can pass it around unchanged.
+    """
+    __slots__ = ('cards', 'hard', 'aces', 'blackjack')
+
+    def __init__(self, cards=()):
+        self.cards = []
+        self.hard = 0
+        self.aces = 0
+        self.blackjack = False
+        for card in cards:
+            self.append(card)
+
+    def append(self, card):
+        self.cards.append(card)
+        self.hard += HARD_VALUE[card]
+        self.aces += IS_ACE[card]
+        self.blackjack = len(self.cards) == 2 and self.hard == 11 and self.aces > 0
+
+    @property
+    def soft(self):
+        """Whether an ace is still counted as 11."""
+        return self.aces > 0 and self.hard <= 11
+
+    @property
+    def total(self):
+        return self.hard + 10 if self.aces and self.hard <= 11 else self.hard
+
+    @property
+    def points(self):
+        """Sum of the cards with every ace counted as 11."""
+        return self.hard + 10 * self.aces
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __getitem__(self, index):
+        return self.cards[index]
+
+    def __repr__(self):
+        return f"Hand([{', '.join(to_string(card) for card in self.cards)}])"
@@ -1,6 +1,21 @@
 import polars
+import argparse
 from os import remove
 from pathlib import Path
+from time import perf_counter
+
+RAW_CSV = 'blackjack_simulator.csv'
+RAW_PARQUET = 'blackjack.parquet'
+OUTPUT = 'processed_blackjack.parquet'
+
+OVERRIDES = {
+    'shoe_id': polars.Int32,
+    'cards_remaining': polars.Int16,
+    'dealer_up': polars.Int16,
+    'run_count': polars.Int16,
+    'true_count': polars.Int16,
+    'win': polars.Float32
+    }
 
 
 def main():
@@ -8,54 +23,102 @@ def main():
     Reads in and clean the data.
     Deletes intermediary files.
     '''
-    if not Path('blackjack.parquet').exists():
-        csv_to_parquet()
-    
-    clean_data()
-    remove('blackjack.parquet')
-    remove('blackjack_simulator.csv')
+    parser = argparse.ArgumentParser(description='Clean the Kaggle blackjack dataset in bounded memory.')
+    parser.add_argument('--min-shoe', type=int, default=0, help='First shoe_id to keep')
+    parser.add_argument('--max-shoe', type=int, default=50000, help='Keep shoe_ids below this')
+    parser.add_argument('--sample', type=float, default=None, help='Keep roughly this fraction of rows')
+    parser.add_argument('--keep-raw', action='store_true', help='Do not delete the raw input files')
+    args = parser.parse_args()
+
+    source = RAW_CSV if Path(RAW_CSV).exists() else RAW_PARQUET
+    clean_data(source, shoe_range=(args.min_shoe, args.max_shoe), sample=args.sample)
 
+    if not args.keep_raw:
+        for path in (RAW_PARQUET, RAW_CSV):
+            if Path(path).exists():
+                remove(path)
 
-def csv_to_parquet():
+
+def scan_raw(source=RAW_CSV, shoe_range=(0, 50000), sample=None, seed=0):
     '''
-    Funnels a sampling of rows with a shoe ID less than 50,000 directly to a Parquet file for easier storage. 
+    Lazily scans the raw CSV (or its Parquet copy), selecting a shoe_id range and optionally a row sample.
+    Both filters are pushed down into the scan so only the selected rows are ever materialized.
     '''
-    overrides = {
-        'shoe_id': polars.Int32, 
-        'cards_remaining': polars.Int16, 
-        'dealer_up': polars.Int16, 
-        'run_count': polars.Int16, 
-        'true_count': polars.Int16, 
-        'win': polars.Float32
-        }
-        
-    (polars
-        .read_csv('blackjack_simulator.csv', schema_overrides=overrides)
-        .filter(polars.col('shoe_id') < 50000)
-        .write_parquet('blackjack.parquet'))
+    if str(source).endswith('.parquet'):
+        frame = polars.scan_parquet(source)
+    else:
+        frame = polars.scan_csv(source, schema_overrides=OVERRIDES)
+
+    min_shoe, max_shoe = shoe_range
+    frame = frame.filter(polars.col('shoe_id').is_between(min_shoe, max_shoe, closed='left'))
+    if sample is not None:
+        # Deterministic row sample from a hash of each row's position in its shoe
+        row_hash = polars.struct(['shoe_id', 'cards_remaining']).hash(seed)
+        frame = frame.filter(row_hash % 1_000_000 < int(sample * 1_000_000))
+    return frame
 
 
-def clean_data():
+def csv_to_parquet(shoe_range=(0, 50000), sample=None):
+    '''
+    Streams the selected shoes directly from the CSV to a Parquet file for easier storage.
+    '''
+    start = perf_counter()
+    scan_raw(RAW_CSV, shoe_range, sample).sink_parquet(RAW_PARQUET)
+    report(RAW_PARQUET, start)
+
+
+def parse_hands(column, item_pattern, dtype):
+    '''
+    Parses a stringified list of hands such as "[['H', 'S'], ['S']]" into a native list of lists.
+    '''
+    return (polars.col(column)
+        .str.extract_all(r'\[[^\[\]]*\]')   # One string per inner hand
+        .list.eval(polars.element().str.extract_all(item_pattern).cast(polars.List(dtype))))
+
+
+def clean(frame):
     '''
     Applies various data cleaning methods to further increase usability of the dataset.
-    Writes to a TSV file.
+    Stringified lists become native list columns and final values become integers.
     '''
-    (polars
-        .read_parquet('blackjack.parquet')
+    return (frame
         .with_columns([
-            polars.col(['actions_taken', 'player_final'])
-                .str.head(-1)   # Remove last character
-                .str.slice(1),   # Remove first character
+            parse_hands('actions_taken', r'[A-Z]+', polars.String),
+            parse_hands('player_final', r'\d+', polars.Int16),
+            polars.col('dealer_final')
+                .str.extract_all(r'\d+')
+                .cast(polars.List(polars.Int16)),
             polars.col('dealer_final_value')
-                .replace('BJ', 21)
+                .replace('BJ', '21')
                 .cast(polars.Int16),
             polars.col('player_final_value')
                 .str.head(-1)
                 .str.slice(1)
-                .replace('BJ', 21)
+                .replace('BJ', '21')
                 .cast(polars.Int16, strict=False)])
-        .drop_nulls()
-        .write_csv('processed_blackjack.tsv', separator='\t'))
+        .drop_nulls())
+
+
+def clean_data(source=RAW_PARQUET, shoe_range=(0, 50000), sample=None, columns=None):
+    '''
+    Cleans the selected rows in one streaming pass and writes them to a typed, compressed Parquet file.
+    Pass columns to keep only those columns (pushed down into the scan).
+    '''
+    start = perf_counter()
+    frame = clean(scan_raw(source, shoe_range, sample))
+    if columns is not None:
+        frame = frame.select(columns)
+    frame.sink_parquet(OUTPUT, compression='zstd')
+    report(OUTPUT, start)
+
+
+def report(path, start):
+    '''
+    Prints how many rows were written and the throughput.
+    '''
+    elapsed = perf_counter() - start
+    rows = polars.scan_parquet(path).select(polars.len()).collect().item()
+    print(f'Wrote {rows:,} rows to {path} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+
+# Dealer final totals, in the order distributions are returned
+OUTCOMES = (17, 18, 19, 20, 21, 'bust')
+BUST = 5
+
+# A composition is a tuple of remaining-card counts for values 1 (ace) to 10 (any ten-valued card)
+FULL_DECK = (4, 4, 4, 4, 4, 4, 4, 4, 4, 16)
+# Compositions are cached by their shares in steps of 1/DEFAULT_RESOLUTION of the shoe
+DEFAULT_RESOLUTION = 26
+MEMO_LIMIT = 200_000  # Dealer sub-results kept across calls before the memo starts over
+
+
+def card_value(rank):
+    """Composition slot value of a card rank: aces are 1 and face cards 10."""
+    if rank == 'ace':
+        return 1
+    if rank in ('jack', 'queen', 'king'):
+        return 10
+    return int(rank)
+
+
+def composition(remaining):
+    """Turns CardCounter.remaining ({rank: count}) into a composition tuple."""
+    counts = [0] * 10
+    for rank, count in remaining.items():
+        counts[card_value(rank) - 1] += count
+    return tuple(counts)
+
+
+def upcard_value(dealer_value):
+    """Maps a dealer value as the agents see it (11 or a non-int for an ace) to 1-10."""
+    if not isinstance(dealer_value, int) or dealer_value in (1, 11):
+        return 1
+    return dealer_value
+
+
+def _final_total(hard, ace):
+    """Soft total if an ace can count as 11, otherwise the hard total."""
+    return hard + 10 if ace and hard + 10 <= 21 else hard
+
+
+class DealerOutcomes:
+    """Distribution of the dealer's final total for the remaining shoe.
+
+    The dealer draws to 17 and stands on soft 17, with every draw taken
+    without replacement from the composition. Results are memoized in an LRU
+    cache of maxsize entries keyed by the upcard and the composition's shares
+    rounded to 1/resolution of the shoe, so shoe states a few cards apart
+    reuse one distribution instead of each costing a full recursion. The
+    recursion's sub-results are kept across calls under the same kind of
+    key, so even a new shoe state mostly reuses the dealer draws worked out
+    for its neighbours. resolution=None keys both on the exact composition,
+    which makes every result exact (and rarely reused in live play).
+    """
+    def __init__(self, maxsize=4096, resolution=DEFAULT_RESOLUTION):
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.memo = {}  # (hard, ace, cache key) -> outcome distribution of a dealer hand in progress
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def distribution(self, upcard, counts):
+        """Probabilities of OUTCOMES given the upcard (1-10) and the composition still to be dealt."""
+        key = (upcard, self.cache_key(counts))
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return result
+        self.misses += 1
+        if not sum(counts):
+            counts = FULL_DECK  # An empty shoe is reshuffled before the dealer draws
+        if len(self.memo) > MEMO_LIMIT:
+            self.memo.clear()
+        result = tuple(self._draw(upcard, upcard == 1, list(counts), sum(counts), self.memo))
+        self.cache[key] = result
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return result
+
+    def cache_key(self, counts):
+        """The composition as the cache sees it: each value's share of the shoe in 1/resolution steps."""
+        cards = sum(counts)
+        if self.resolution is None or not cards:
+            return counts
+        return tuple(round(count * self.resolution / cards) for count in counts)
+
+    def _draw(self, hard, ace, counts, cards, memo):
+        total = _final_total(hard, ace)
+        outcome = [0.0] * 6
+        if total > 21:
+            outcome[BUST] = 1.0
+            return outcome
+        if total >= 17:
+            outcome[total - 17] = 1.0
+            return outcome
+        key = (hard, ace, self.cache_key(tuple(counts)))
+        if key in memo:
+            return memo[key]
+        if not cards:
+            counts, cards = list(FULL_DECK), sum(FULL_DECK)
+        for value in range(1, 11):
+            count = counts[value - 1]
+            if not count:
+                continue
+            p = count / cards
+            counts[value - 1] -= 1
+            sub = self._draw(hard + value, ace or value == 1, counts, cards - 1, memo)
+            counts[value - 1] += 1
+            for i in range(6):
+                outcome[i] += p * sub[i]
+        memo[key] = outcome
+        return outcome
+
+    def action_values(self, player_total, soft, upcard, counts):
+        """Expected value per unit bet of (standing, hitting) with the given hand.
+
+        The dealer distribution is that of the composition, up to the cache's
+        rounding. The player's own future draws use the same composition
+        probabilities, which keeps a decision to one (usually cached) dealer
+        distribution.
+        """
+        dealer = self.distribution(upcard, counts)
+        cards = sum(counts)
+        if not cards:
+            counts, cards = FULL_DECK, sum(FULL_DECK)
+        draws = [(value, count / cards) for value, count in enumerate(counts, 1) if count]
+        stand = [_stand_value(total, dealer) for total in range(22)]
+        memo = {}
+
+        def best(hard, ace):
+            key = (hard, ace)
+            if key not in memo:
+                memo[key] = max(stand[_final_total(hard, ace)], hit(hard, ace))
+            return memo[key]
+
+        def hit(hard, ace):
+            value = 0.0
+            for card, p in draws:
+                value += p * (-1.0 if hard + card > 21 else best(hard + card, ace or card == 1))
+            return value
+
+        hard = player_total - 10 if soft else player_total
+        return stand[min(player_total, 21)], hit(hard, soft)
+
+
+def _stand_value(total, dealer):
+    """Expected value of standing on total against a dealer outcome distribution."""
+    value = dealer[BUST]
+    for i, p in enumerate(dealer[:BUST]):
+        dealer_total = 17 + i
+        if dealer_total < total:
+            value += p
+        elif dealer_total > total:
+            value -= p
+    return value
@@ -0,0 +1,278 @@
+"""Blackjack game logic as a stream of round events, independent of any renderer.
+
+    python game_engine.py --rounds 10000                     # headless, full speed
+    python game_engine.py --rounds 20 --speed 10             # printed playback at 10x
+    python game_engine.py --rounds 50 --record game.jsonl    # save the events for replay
+
+The pygame table (blackjack_visualization.py) consumes the same events at its
+own frame rate, so agent inference never stalls a frame.
+"""
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import namedtuple
+from cards import Hand, describe
+from simulation import Player, init_deck, get_random_card, shuffle_if_due, load_agent
+
+DEALER = -1  # Seat number of the dealer in events
+SPEEDS = (1, 10, 100)  # Playback speeds the renderers offer
+
+# One thing that happened at the table. card is a card code, total the seat's
+# hand total after the event, money the seat's bankroll after it; bet is only
+# set on the 'seat' events that introduce each player.
+RoundEvent = namedtuple('RoundEvent', ['kind', 'seat', 'card', 'total', 'money', 'message', 'bet'],
+                        defaults=(None, None, None, '', None))
+
+# How long each kind of event stays on screen at 1x
+EVENT_SECONDS = {
+    'seat': 0.0,
+    'round': 0.5,
+    'shuffle': 0.8,
+    'deal': 0.25,
+    'hit': 0.5,
+    'stand': 0.4,
+    'bust': 0.6,
+    'out': 0.4,
+    'settle': 0.6,
+    'end': 1.0,
+}
+
+
+class GameEngine:
+    """Plays rounds with the same rules as the pygame table and yields RoundEvents as they happen."""
+    def __init__(self, players, deck=None):
+        self.players = players
+        self.deck = deck if deck is not None else (players[0].deck if players else init_deck())
+
+    def rounds(self, num_rounds=None):
+        """Events for num_rounds rounds (forever if None), stopping once every player is broke."""
+        for seat, player in enumerate(self.players):
+            yield RoundEvent('seat', seat, money=player.money, message=player.type, bet=player.bet)
+        played = 0
+        while num_rounds is None or played < num_rounds:
+            if all(player.money <= 0 for player in self.players):
+                return
+            yield from self.play_round()
+            played += 1
+
+    def reshuffled(self, shuffles):
+        """A 'shuffle' event if the shoe ran dry and reshuffled since it had shuffled `shuffles` times."""
+        if self.deck.shuffles != shuffles:
+            return [RoundEvent('shuffle', DEALER, message="The shoe ran out, reshuffling")]
+        return []
+
+    def play_round(self):
+        if shuffle_if_due(self.deck):
+            yield RoundEvent('shuffle', DEALER, message="Cut card reached, reshuffling the shoe")
+        yield RoundEvent('round', DEALER)
+        shuffles = self.deck.shuffles
+        dealer_hand = Hand((get_random_card(self.deck),))
+        yield from self.reshuffled(shuffles)
+        yield RoundEvent('deal', DEALER, dealer_hand[0], dealer_hand.total)
+
+        seated = []
+        for seat, player in enumerate(self.players):
+            if player.money <= 0:
+                player.message = "You're out of money!"
+                player.game_over = True
+                yield RoundEvent('out', seat, money=player.money, message=player.message)
+                continue
+            shuffles = self.deck.shuffles
+            player.reset_hand(dealer_hand)
+            yield from self.reshuffled(shuffles)
+            seated.append((seat, player))
+            dealt = Hand()
+            for card in player.hand:
+                dealt.append(card)
+                yield RoundEvent('deal', seat, card, dealt.total, player.money, player.message)
+
+        for seat, player in seated:
+            yield from self.player_turn(seat, player)
+
+        while dealer_hand.total < 17:
+            shuffles = self.deck.shuffles
+            card = get_random_card(self.deck)
+            yield from self.reshuffled(shuffles)
+            dealer_hand.append(card)
+            yield RoundEvent('hit', DEALER, card, dealer_hand.total)
+
+        dealer_value = dealer_hand.total
+        for seat, player in seated:
+            if player.bust:
+                continue
+            player_value = player.hand.total
+            if dealer_value > 21 or dealer_value < player_value:
+                player.message = "Player wins!" + str(player_value) + ">" + str(dealer_value)
+                player.money += player.bet
+            elif dealer_value > player_value:
+                player.message = "Dealer wins!" + str(player_value) + "<" + str(dealer_value)
+                player.money -= player.bet
+            else:
+                player.message = "It's a tie!" + str(player_value) + "=" + str(dealer_value)
+            yield RoundEvent('settle', seat, total=player_value, money=player.money, message=player.message)
+        yield RoundEvent('end', DEALER, total=dealer_value)
+
+    def player_turn(self, seat, player):
+        while player.turn:
+            action = player.action()
+            if action == 1:
+                shuffles = self.deck.shuffles
+                card = get_random_card(self.deck)
+                yield from self.reshuffled(shuffles)
+                player.hand.append(card)
+                player_value = player.hand.total
+                if player_value > 21:
+                    player.bust = True
+                    player.turn = False
+                    player.message = "Player busts! Dealer wins!"
+                    player.money -= player.bet
+                    yield RoundEvent('hit', seat, card, player_value, player.money)
+                    yield RoundEvent('bust', seat, total=player_value, money=player.money, message=player.message)
+                    return
+                yield RoundEvent('hit', seat, card, player_value, player.money)
+                if player_value == 21:
+                    player.turn = False
+            else:
+                player.turn = False
+                yield RoundEvent('stand', seat, total=player.hand.total, money=player.money, message=f"Stands on {player.hand.total}")
+
+
+class EventPump:
+    """Runs an event generator on a background thread so a renderer can poll it without blocking.
+
+    The queue is bounded, so the engine runs at most maxsize events ahead of
+    whoever consumes them.
+    """
+    def __init__(self, events, maxsize=1024):
+        self.queue = queue.Queue(maxsize)
+        self.finished = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(events,), daemon=True)
+        self._thread.start()
+
+    def _run(self, events):
+        for event in events:
+            while not self._stopped.is_set():
+                try:
+                    self.queue.put(event, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if self._stopped.is_set():
+                return
+        self.queue.put(None)  # End of stream
+
+    def poll(self):
+        """The next event if one is ready, otherwise None."""
+        if self.finished:
+            return None
+        try:
+            event = self.queue.get_nowait()
+        except queue.Empty:
+            return None
+        if event is None:
+            self.finished = True
+        return event
+
+    def stop(self):
+        self._stopped.set()
+
+
+class Playback:
+    """Paces events at 1x, 10x or 100x of EVENT_SECONDS; speed None releases them immediately."""
+    def __init__(self, speed=1):
+        self.speed = speed
+        self.next_due = 0.0
+
+    def due(self, now=None):
+        """Whether the next event may be shown yet."""
+        return self.speed is None or (time.perf_counter() if now is None else now) >= self.next_due
+
+    def shown(self, event, now=None):
+        """Starts the on-screen time of an event that was just shown."""
+        if self.speed is not None:
+            now = time.perf_counter() if now is None else now
+            self.next_due = max(self.next_due, now - 0.1) + EVENT_SECONDS[event.kind] / self.speed
+
+
+def run_headless(events):
+    """Consumes an event stream at full speed; returns (rounds, events) played."""
+    rounds = count = 0
+    for event in events:
+        count += 1
+        rounds += event.kind == 'end'
+    return rounds, count
+
+
+def play_back(events, speed=1, out=print):
+    """Prints an event stream paced at the given speed (None for no pacing)."""
+    playback = Playback(speed)
+    for event in events:
+        while not playback.due():
+            time.sleep(max(0.0, playback.next_due - time.perf_counter()))
+        out(format_event(event))
+        playback.shown(event)
+
+
+def format_event(event):
+    who = "Dealer" if event.seat == DEALER else f"Seat {event.seat}"
+    if event.kind in ('deal', 'hit'):
+        return f"{who} {event.kind}s {describe(event.card)} ({event.total})"
+    if event.kind == 'round':
+        return "--- new round ---"
+    if event.kind == 'shuffle':
+        return event.message
+    if event.kind == 'end':
+        return f"Dealer finishes on {event.total}"
+    if event.kind == 'seat':
+        return f"{who}: {event.message} with ${event.money}"
+    return f"{who} {event.kind}: {event.message} (${event.money})"
+
+
+def save_events(events, path):
+    """Writes events as JSON lines and passes them through, so a stream can be recorded while it plays."""
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(event._asdict()) + "\n")
+            if event.kind == 'end':
+                f.flush()  # Endless streams are cut off mid-round when the window closes
+            yield event
+
+
+def load_events(path):
+    with open(path) as f:
+        for line in f:
+            yield RoundEvent(**json.loads(line))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the blackjack game engine without a display")
+    parser.add_argument("--agents", nargs="+", default=["rl", "ml", "rule"])
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--speed", type=int, choices=SPEEDS, default=None, help="Print events paced at this speed")
+    parser.add_argument("--record", default=None, help="Save the event stream to this JSON lines file")
+    parser.add_argument("--replay", default=None, help="Play back a recorded event stream instead")
+    args = parser.parse_args()
+
+    if args.replay:
+        events = load_events(args.replay)
+    else:
+        deck = init_deck()
+        players = [Player(load_agent(agent_type), deck, agent_type) for agent_type in args.agents]
+        events = GameEngine(players, deck).rounds(args.rounds)
+    if args.record:
+        events = save_events(events, args.record)
+
+    if args.speed is None:
+        start = time.perf_counter()
+        rounds, count = run_headless(events)
+        elapsed = time.perf_counter() - start
+        print(f"{rounds} rounds, {count} events in {elapsed:.2f}s ({rounds / max(elapsed, 1e-9):,.0f} rounds/sec)")
+    else:
+        play_back(events, args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,120 +1,135 @@
+import numpy as np
 import pandas as pd
-import ast
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
+import os
 import joblib
-from collections import Counter
+from card_counting import CardCounter, card_rank
+from model_store import ModelStore, BASE_DIR
 
-class MLAgent:
-    def __init__(self):
-        # Initialize deck count (Standard single deck)
-        self.model = joblib.load("blackjack_model.pkl")
-        self.deck = Counter({i: 4 for i in range(2, 11)})
-        self.deck.update({'ace': 4})
-        self.deck.update({'jack': 4})
-        self.deck.update({'queen': 4})
-        self.deck.update({'king': 4})
-        self.seen_cards = 0  # Track seen cards
-        self.true_count = 0
-
-    def ml_decision(self, player_total, dealer_card):
-        """Predicts the best first move (Hit = 1, Stand = 0) based on winning hands."""
-        self.true_count = self.get_true_count()
-        input_data = pd.DataFrame([[player_total, dealer_card, self.true_count]], 
-                                columns=['player_final_value', 'dealer_up', 'true_count'])
-        
-        prediction = self.model.predict(input_data)[0]  # Predicts first action (1 = Hit, 0 = Stand)
-        
-        return 1 if prediction == 1 else 0  # Convert to 'h' or 's' for game logic
-
-    def update_count(self, card_ovr):
-        """Updates the card count when a new card is dealt."""
-        card = card_ovr[1][0]
-        if card not in ['ace', 'jack', 'queen', 'king']:
-            card = int(card)
-        if card in self.deck and self.deck[card] > 0:
-            self.deck[card] -= 1
-        self.seen_cards += 1  # Track seen cards
-        
-    def get_true_count(self):
-        """Calculates the True Count for card counting strategy."""
-        running_count = 0
-        for card, count in self.deck.items():
-            if card in [2, 3, 4, 5, 6]:
-                running_count += count  # Low cards increase count
-            elif card in [10, 'jack', 'queen', 'king', 'ace']:
-                running_count -= count  # High cards decrease count
-
-        remaining_cards = sum(self.deck.values())  # Number of remaining cards
-        remaining_decks = max(remaining_cards / 52, 1)  # Avoid division by zero
+FEATURES = ['player_final_value', 'dealer_up', 'true_count']
+ML_MODEL = "ml_model"  # Name of the classifier in the model store
+LEGACY_ML_MODEL = os.path.join(BASE_DIR, "blackjack_model.pkl")  # Model shipped with the repo
 
-        return running_count / remaining_decks  # True Count formula
 
+def load_ml_model(store=None):
+    """Loads the latest classifier from the model store, or the one shipped with the repo."""
+    store = store or ModelStore()
+    return joblib.load(store.artifact_path(ML_MODEL) or LEGACY_ML_MODEL)
 
-if __name__ == "__main__":
-    # Load the dataset
-    df = pd.read_csv("processed_blackjack.tsv", sep="\t")
-
-    # Convert actions_taken from string to list
-    def parse_actions(action_str):
-        """Convert string representation of a list into an actual list."""
-        try:
-            action_list = ast.literal_eval(action_str)  # Convert string to list
-            if not isinstance(action_list, list):
-                return None
-            return action_list
-        except (ValueError, SyntaxError):
-            return None
 
-    df['actions_taken'] = df['actions_taken'].apply(parse_actions)
+def predict_actions(model, player_totals, dealer_ups, true_counts):
+    """Predicts hit (1) / stand (0) for arrays of states with one predict call."""
+    X = np.column_stack(np.broadcast_arrays(player_totals, dealer_ups, true_counts)).astype(np.float32)
+    if hasattr(model, 'tree_') and model.n_outputs_ == 1:
+        # Query the fitted tree directly and skip the DataFrame and input validation overhead
+        proba = model.tree_.predict(X)
+        return model.classes_.take(np.argmax(proba, axis=1))
+    return model.predict(pd.DataFrame(X, columns=FEATURES))
 
-    # Keep only rows where every action is "H" or "S"
-    df = df[df['actions_taken'].apply(lambda x: x is not None and all(a in ['H', 'S'] for a in x))]
 
-    # **Filter out only winning hands (win == 1 or 2)**
-    df = df[df['win'].isin([1, 2])]
+class MLAgent:
+    def __init__(self, num_decks=1, count_system='hi-lo', store=None):
+        self.store = store or ModelStore()
+        self._model = None  # Loaded on first decision
+        # Shared counting engine tracks the shoe composition and the count
+        self.counter = CardCounter(num_decks, count_system)
+        self.true_count = 0
 
-    # **Use the first action taken in a winning hand as `y`**
-    df['first_action'] = df['actions_taken'].apply(lambda x: x[0] if len(x) > 0 else None)
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_ml_model(self.store)
+        return self._model
 
-    # Drop any remaining NaN values in first_action
-    df = df.dropna(subset=['first_action'])
+    def ml_decision(self, player_total, dealer_card):
+        """Predicts the best first move (Hit = 1, Stand = 0) based on winning hands."""
+        self.true_count = self.get_true_count()
+        return int(self.decide_batch([player_total], [dealer_card], [self.true_count])[0])
 
-    # Encode "H" as 1 (Hit) and "S" as 0 (Stand)
-    df['first_action'] = df['first_action'].map({'H': 1, 'S': 0})
+    def decide_batch(self, player_totals, dealer_ups, true_counts):
+        """Predicts hit (1) / stand (0) for many seats or tables at once."""
+        predictions = predict_actions(self.model, player_totals, dealer_ups, true_counts)
+        return (predictions == 1).astype(np.int8)
 
-    # Extract only the first dealer card from dealer_final
-    def extract_dealer_upcard(dealer_hand_str):
-        """Extracts the first card from the dealer's final hand."""
-        try:
-            dealer_hand = ast.literal_eval(dealer_hand_str)  # Convert string to list
-            if isinstance(dealer_hand, list) and len(dealer_hand) > 0:
-                return dealer_hand[0]  # First card (dealer's upcard)
-        except (ValueError, SyntaxError):
-            return None  # Handle errors gracefully
-        return None
+    @property
+    def deck(self):
+        """Remaining cards per rank."""
+        return self.counter.remaining
 
-    df['dealer_up'] = df['dealer_final'].apply(extract_dealer_upcard)
+    @property
+    def seen_cards(self):
+        return self.counter.seen_cards
 
-    # Ensure no missing values exist in required columns
-    df = df.dropna(subset=['player_final_value', 'dealer_up', 'true_count', 'first_action'])
+    def update_count(self, card):
+        """Updates the card count when a new card (a card code) is dealt."""
+        self.counter.deal(card_rank(card))
+        
+    def get_true_count(self):
+        """Calculates the True Count for card counting strategy."""
+        return self.counter.true_count()
+
+
+def scan_training_data(path="processed_blackjack.parquet"):
+    """Lazily derives (features, first_action) rows from the cleaned dataset with vectorized expressions.
+
+    Keeps winning hands (win == 1 or 2) played as a single hand of only hits
+    and stands, labels them with the first action (Hit = 1, Stand = 0) and
+    takes the dealer upcard from the first card of dealer_final. Reads the
+    typed Parquet output of cleandata, or the older stringified TSV.
+    """
+    import polars
+
+    if str(path).endswith('.tsv'):
+        actions = polars.col('actions_taken')
+        return (polars
+            .scan_csv(path, separator='\t')
+            .select(['actions_taken', 'dealer_final', 'player_final_value', 'true_count', 'win'])
+            .filter(actions.str.contains(r"^\[('[HS]'(, )?)*\]$"))  # A list made only of 'H' and 'S'
+            .filter(polars.col('win').cast(polars.Float64).is_in([1.0, 2.0]))
+            .with_columns(
+                first_action=actions.str.extract(r"^\['([HS])'", 1).replace_strict({'H': 1, 'S': 0}, default=None),
+                dealer_up=polars.col('dealer_final').str.extract(r"^\[\s*(-?\d+)", 1).cast(polars.Int16, strict=False))
+            .select(FEATURES + ['first_action'])
+            .drop_nulls())
+
+    hand = polars.col('actions_taken').list.first()
+    return (polars
+        .scan_parquet(path)
+        .select(['actions_taken', 'dealer_final', 'player_final_value', 'true_count', 'win'])
+        .filter(polars.col('actions_taken').list.len() == 1)
+        .filter(hand.list.eval(polars.element().is_in(['H', 'S'])).list.all())
+        .filter(polars.col('win').cast(polars.Float64).is_in([1.0, 2.0]))
+        .with_columns(
+            first_action=hand.list.first().replace_strict({'H': 1, 'S': 0}, default=None),
+            dealer_up=polars.col('dealer_final').list.first())
+        .select(FEATURES + ['first_action'])
+        .drop_nulls())
+
+
+def load_training_arrays(path="processed_blackjack.parquet"):
+    """Streams the training rows into a float32 feature matrix and an int8 label vector."""
+    data = scan_training_data(path).collect(engine='streaming')
+    X = data.select(FEATURES).to_numpy().astype(np.float32)
+    y = data['first_action'].to_numpy().astype(np.int8)
+    return X, y
 
-    # **Updated Features & Target**
-    X = df[['player_final_value', 'dealer_up', 'true_count']]  # No prev_action anymore
-    y = df['first_action']  # Training on the best first action from winning hands
 
-    # Ensure X and y are aligned
-    X = X.dropna()
-    y = y.loc[X.index]
+if __name__ == "__main__":
+    X, y = load_training_arrays("processed_blackjack.parquet")
 
     # Train-test split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    # Train Decision Tree model
+    # Train Decision Tree model (column names kept so predictions on DataFrames line up)
     model = DecisionTreeClassifier()
-    model.fit(X_train, y_train)
-
-    # Save trained model
-    joblib.dump(model, "blackjack_model.pkl")
+    model.fit(pd.DataFrame(X_train, columns=FEATURES), y_train)
+
+    # Save trained model as a new model-store version
+    ModelStore().save(ML_MODEL, lambda path: joblib.dump(model, path), "model.pkl", {
+        'features': FEATURES,
+        'training_rows': len(X_train),
+        'test_accuracy': model.score(pd.DataFrame(X_test, columns=FEATURES), y_test),
+    })
 
     print("Model trained and saved successfully.")
@@ -0,0 +1,65 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+
+# Models live next to the code unless BLACKJACK_MODEL_DIR points elsewhere
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.environ.get("BLACKJACK_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+
+
+class ModelStore:
+    """Versioned model artifacts on disk: <root>/<name>/v0001/{artifact, metadata.json}."""
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def versions(self, name):
+        """All saved versions of a model, oldest first."""
+        model_dir = os.path.join(self.root, name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(int(entry[1:]) for entry in os.listdir(model_dir)
+                      if entry.startswith('v') and entry[1:].isdigit())
+
+    def latest_version(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def version_dir(self, name, version):
+        return os.path.join(self.root, name, f"v{version:04d}")
+
+    def metadata(self, name, version=None):
+        """Metadata of a version (the latest by default), or None if nothing is saved."""
+        version = self.latest_version(name) if version is None else version
+        if version is None:
+            return None
+        with open(os.path.join(self.version_dir(name, version), "metadata.json")) as f:
+            return json.load(f)
+
+    def artifact_path(self, name, version=None):
+        """Path to a version's artifact (the latest by default), or None if nothing is saved."""
+        metadata = self.metadata(name, version)
+        if metadata is None:
+            return None
+        return os.path.join(self.version_dir(name, metadata['version']), metadata['artifact'])
+
+    def save(self, name, write_artifact, filename, metadata=None):
+        """Saves a new version; write_artifact(path) writes the artifact file.
+
+        The version directory is staged and renamed into place, so a crash mid-save
+        never leaves a half-written latest version behind.
+        """
+        version = (self.latest_version(name) or 0) + 1
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{name}-", dir=os.path.join(self.root, name))
+        try:
+            write_artifact(os.path.join(staging, filename))
+            record = dict(metadata or {}, name=name, version=version, artifact=filename, created=time.time())
+            with open(os.path.join(staging, "metadata.json"), 'w') as f:
+                json.dump(record, f, indent=2)
+            os.rename(staging, self.version_dir(name, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
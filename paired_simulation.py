@@ -0,0 +1,191 @@
+"""Common-random-numbers comparison: every agent plays the same cards on its own table.
+
+    python paired_simulation.py --agents rl ml rule --turns 20000 --seed 1
+
+Each round is cut from one seeded shoe as a block of cards: one half feeds
+the player's hand and hits, the other the dealer's. Every agent is dealt the
+same starting hand, draws the same hit cards and faces the same dealer hand,
+whatever the other agents do. The card luck then cancels in the per-round
+difference between two agents, so the paired confidence interval is much
+tighter than comparing their separate averages and a real difference shows up
+in a fraction of the hands.
+"""
+import random
+import argparse
+import itertools
+from statistics import NormalDist
+from cards import Hand
+from shoe import DEFAULT_PENETRATION, Shoe
+from simulation import AGENT_CLASSES, Player, RunningStats, load_agent
+
+# Cards reserved per round for each of the player and the dealer; a hand that
+# somehow needs more draws the rest from a deck shuffled with the round's spare seed
+ROUND_CARDS = 12
+
+
+def deal_rounds(num_rounds=None, num_decks=1, penetration=DEFAULT_PENETRATION, seed=None):
+    """Yields (player_cards, dealer_cards, spare_seeds) for each round (forever if num_rounds is None).
+
+    The blocks come from one seeded shoe in order, reshuffling at the cut
+    card, and the two spare seeds (player side, dealer side) from the same
+    RNG, so a seed always produces the same rounds.
+    """
+    shoe = Shoe(num_decks, penetration, random.Random(seed))
+    rounds = itertools.count() if num_rounds is None else range(num_rounds)
+    for _ in rounds:
+        shoe.shuffle_if_due()
+        block = shoe.take(2 * ROUND_CARDS)
+        spare_seeds = (shoe.rng.getrandbits(64), shoe.rng.getrandbits(64))
+        yield block[:ROUND_CARDS], block[ROUND_CARDS:], spare_seeds
+
+
+def draw_card(cards, spare_seed):
+    """Pops a round's next card, refilling the list from a deck shuffled with spare_seed if it has run out.
+
+    Every table refills from the same seed, so even the extra cards stay common.
+    """
+    if not cards:
+        cards.extend(Shoe(rng=random.Random(spare_seed)).cards)
+    return cards.pop()
+
+
+def settle(player, dealer_value):
+    """Net result of the player's hand in bets: 1 win, 0 tie, -1 loss."""
+    if player.bust:
+        return -1
+    player_value = player.hand.total
+    if dealer_value > 21 or dealer_value < player_value:
+        return 1
+    if dealer_value > player_value:
+        return -1
+    return 0
+
+
+def new_outcomes():
+    return {'results': RunningStats(), 'wins': 0, 'ties': 0, 'losses': 0}
+
+
+def record_outcome(data, result):
+    """Adds one hand's net result (in bets) to an agent's outcomes."""
+    data['results'].add(result)
+    if result > 0:
+        data['wins'] += 1
+    elif result < 0:
+        data['losses'] += 1
+    else:
+        data['ties'] += 1
+
+
+def new_report(players):
+    return {
+        'agents': {player.type: new_outcomes() for player in players},
+        'pairs': {(a.type, b.type): RunningStats() for a, b in itertools.combinations(players, 2)},
+    }
+
+
+def play_paired(players, num_turns, num_decks=1, penetration=DEFAULT_PENETRATION, seed=None, report=None, rounds=None):
+    """Plays num_turns rounds with every player on its own copy of the same cards.
+
+    Returns the per-agent results and the per-pair differences (first minus
+    second) as RunningStats, in bets per hand. To play a long run in chunks,
+    pass the report to keep adding to and a deal_rounds() iterator to keep
+    dealing from.
+    """
+    if report is None:
+        report = new_report(players)
+    if rounds is None:
+        rounds = deal_rounds(num_turns, num_decks, penetration, seed)
+    agents = report['agents']
+    pairs = report['pairs']
+    results = {}
+
+    for player_cards, dealer_cards, (player_spare, dealer_spare) in itertools.islice(rounds, num_turns):
+        dealer_cards = list(dealer_cards)
+        upcard = Hand((dealer_cards.pop(),))
+        dealer_hand = Hand(upcard)
+        while dealer_hand.total < 17:  # The dealer's play never depends on the players'
+            dealer_hand.append(draw_card(dealer_cards, dealer_spare))
+        dealer_value = dealer_hand.total
+
+        for player in players:
+            player.deck = list(player_cards)  # Each table pops from its own copy
+            player.reset_hand(upcard)
+            while player.turn and not player.bust:
+                if player.action() == 1:
+                    player.hand.append(draw_card(player.deck, player_spare))
+                    if player.hand.total > 21:
+                        player.bust = True
+                else:
+                    player.turn = False
+            result = settle(player, dealer_value)
+            results[player.type] = result
+            record_outcome(agents[player.type], result)
+
+        for (first, second), stats in pairs.items():
+            stats.add(results[first] - results[second])
+
+    return report
+
+
+def z_score(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def print_report(report, confidence=0.95):
+    z = z_score(confidence)
+    label = f"{confidence:.0%} CI"
+    print(f"{'agent':<8} {'hands':>8} {'EV/hand':>9} {label:>20} {'win':>7} {'tie':>7} {'loss':>7}")
+    for agent_type, data in report['agents'].items():
+        results = data['results']
+        low, high = results.interval(z)
+        hands = max(1, results.count)
+        print(f"{agent_type:<8} {results.count:>8} {results.mean:>+9.4f} [{low:>+8.4f}, {high:>+8.4f}] "
+              f"{data['wins'] / hands:>7.1%} {data['ties'] / hands:>7.1%} {data['losses'] / hands:>7.1%}")
+
+    print(f"\n{'pair':<12} {'delta/hand':>10} {label:>20} {'paired se':>10} {'unpaired se':>12}")
+    for (first, second), stats in report['pairs'].items():
+        low, high = stats.interval(z)
+        # Standard error the same comparison would have with independently dealt cards
+        unpaired = (report['agents'][first]['results'].std_error ** 2 + report['agents'][second]['results'].std_error ** 2) ** 0.5
+        verdict = "" if low <= 0 <= high else f"  {first if stats.mean > 0 else second} is better"
+        print(f"{first + '-' + second:<12} {stats.mean:>+10.4f} [{low:>+8.4f}, {high:>+8.4f}] "
+              f"{stats.std_error:>10.4f} {unpaired:>12.4f}{verdict}")
+
+
+def load_players(agent_types, compiled=False):
+    """One Player per agent type, each of which will get its own copy of the cards."""
+    if len(set(agent_types)) != len(agent_types):
+        raise ValueError("Each agent type can only be compared once")
+    placeholder = Shoe(rng=random.Random(0))  # Player deals an opening hand on construction
+    players = [Player(load_agent(agent_type), placeholder, agent_type) for agent_type in agent_types]
+    if compiled:
+        from policy_table import compile_policy
+        for player in players:
+            player.policy = compile_policy(player.agent, player.type)
+    return players
+
+
+def simulate_paired(agent_types, num_turns=500, seed=None, num_decks=1, penetration=DEFAULT_PENETRATION,
+                    compiled=False, confidence=0.95):
+    """Loads the agents, plays them on common cards and prints the paired comparison."""
+    players = load_players(agent_types, compiled)
+    report = play_paired(players, num_turns, num_decks, penetration, seed)
+    print_report(report, confidence)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare agents on identical cards with paired confidence intervals")
+    parser.add_argument("--agents", nargs="+", default=["rl", "ml", "rule"], choices=sorted(AGENT_CLASSES))
+    parser.add_argument("--turns", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in the shoe")
+    parser.add_argument("--penetration", type=float, default=DEFAULT_PENETRATION)
+    parser.add_argument("--compiled", action="store_true", help="Serve every agent from a precompiled policy table")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    args = parser.parse_args()
+    simulate_paired(args.agents, args.turns, args.seed, args.decks, args.penetration, args.compiled, args.confidence)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from shoe import DEFAULT_PENETRATION
+from simulation import (Player, init_deck, load_agent, play_hands, merge_stats, finalize_stats,
+                        write_stats_csv, visualize_stats)
+
+# Agents loaded once per worker process by _init_worker
+_worker_agents = {}
+_worker_policies = {}
+
+
+def _init_worker(agent_types, compiled):
+    for agent_type in agent_types:
+        _worker_agents[agent_type] = load_agent(agent_type)
+        if compiled:
+            from policy_table import compile_policy
+            _worker_policies[agent_type] = compile_policy(_worker_agents[agent_type], agent_type)
+
+
+def _run_shard(agent_types, num_turns, shard_seed, num_decks=1, penetration=DEFAULT_PENETRATION,
+               bankrolls=None, bankroll_every=1, start=0):
+    """Plays one shard with its own seeded shoe and returns the raw accumulators.
+
+    With bankrolls, the shard's trajectories go to that directory, sampled as if
+    the run had already played start turns.
+    """
+    random.seed(shard_seed)
+    deck = init_deck(num_decks, penetration)
+    players = [Player(_worker_agents[agent_type], deck, agent_type, _worker_policies.get(agent_type))
+               for agent_type in agent_types]
+    if bankrolls is None:
+        return play_hands(players, deck, num_turns)
+    from bankrolls import BankrollRecorder
+    with BankrollRecorder(bankrolls, agent_types, bankroll_every, start=start) as recorder:
+        return play_hands(players, deck, num_turns, bankrolls=recorder)
+
+
+def split_turns(num_turns, workers):
+    """Splits num_turns into one contiguous shard per worker."""
+    base, extra = divmod(num_turns, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+def shard_seeds(seed, workers):
+    """One independent seed per shard, fully determined by the run seed and worker count."""
+    seeder = random.Random(seed)
+    return [seeder.getrandbits(64) for _ in range(workers)]
+
+
+def simulate_sharded(agent_types, num_turns=500, workers=None, seed=0, compiled=False,
+                     output="output.csv", plot=False, num_decks=1, penetration=DEFAULT_PENETRATION,
+                     bankrolls=None, bankroll_every=1):
+    """Splits num_turns across a process pool and merges the per-agent stats in shard order.
+
+    Counts and averages are exact sums over the shards, and a given seed and
+    worker count always produce the same result. Every shard seats fresh
+    players with the starting bankroll, though, so bankroll summaries and
+    restarts are those of the shards played separately rather than of one
+    back-to-back run, and streaks crossing a shard boundary are only
+    approximated by merging the shards' edge streaks.
+    With bankrolls, each shard streams its trajectories to its own part directory
+    and the parts are joined in shard order.
+    """
+    workers = workers or os.cpu_count()
+    shards = [turns for turns in split_turns(num_turns, workers) if turns]
+    seeds = shard_seeds(seed, workers)[:len(shards)]
+    parts = [f"{bankrolls}.part{i}" if bankrolls else None for i in range(len(shards))]
+    starts = [sum(shards[:i]) for i in range(len(shards))]
+
+    # Spawned rather than forked: polars (which writes the bankrolls) deadlocks in a forked child once the parent used it
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(agent_types, compiled)) as pool:
+        results = list(pool.map(_run_shard, [agent_types] * len(shards), shards, seeds,
+                                [num_decks] * len(shards), [penetration] * len(shards),
+                                parts, [bankroll_every] * len(shards), starts))
+    if bankrolls:
+        from bankrolls import concat_bankrolls
+        concat_bankrolls(parts, bankrolls)
+
+    stats = results[0]
+    for shard_stats in results[1:]:
+        stats = merge_stats(stats, shard_stats)
+    stats = finalize_stats(stats)
+
+    write_stats_csv(stats, output)
+    if plot:
+        visualize_stats(stats, bankrolls)
+    return stats
@@ -0,0 +1,79 @@
+import numpy as np
+
+# State space every agent is compiled over
+MAX_TOTAL = 22  # Player totals 0..21 (anything above is a bust)
+DEALER_SLOTS = 12  # Dealer upcard values 0..11 (aces are 11)
+MIN_COUNT = -5  # True counts are rounded and clipped into [MIN_COUNT, MAX_COUNT]
+MAX_COUNT = 5
+COUNT_BUCKETS = MAX_COUNT - MIN_COUNT + 1
+
+
+def count_bucket(true_count):
+    """Maps a true count (scalar or array) to its bucket index."""
+    return np.clip(np.rint(true_count), MIN_COUNT, MAX_COUNT).astype(np.int64) - MIN_COUNT
+
+
+class PolicyTable:
+    """Dense hit (1) / stand (0) table indexed by (total, soft, dealer_up, count bucket)."""
+    def __init__(self, actions):
+        self.actions = np.ascontiguousarray(actions, dtype=np.int8)
+
+    def decide(self, player_value, soft, dealer_value, true_count=0):
+        """O(1) lookup of a single decision."""
+        if player_value >= MAX_TOTAL:
+            return 0
+        bucket = min(max(int(round(true_count)), MIN_COUNT), MAX_COUNT) - MIN_COUNT
+        return int(self.actions[player_value, int(soft), dealer_value, bucket])
+
+    def hit_table(self, true_count=0):
+        """The (total, soft, dealer_up) slice for a fixed true count."""
+        return self.actions[:, :, :, count_bucket(true_count)].astype(np.bool_)
+
+    def save(self, filename):
+        np.save(filename, self.actions)
+
+    @classmethod
+    def load(cls, filename):
+        return cls(np.load(filename, mmap_mode='r'))
+
+
+def state_grid():
+    """Every (total, soft, dealer_up, true_count) state as flat arrays."""
+    totals, soft, dealer, buckets = np.meshgrid(
+        np.arange(MAX_TOTAL), np.arange(2), np.arange(DEALER_SLOTS), np.arange(COUNT_BUCKETS), indexing='ij')
+    return totals.ravel(), soft.ravel(), dealer.ravel(), buckets.ravel() + MIN_COUNT
+
+
+def compile_policy(agent, agent_type):
+    """Enumerates an agent's decisions over the whole state space into a PolicyTable."""
+    totals, soft, dealer, true_counts = state_grid()
+    if agent_type == 'rule':
+        return compile_rules_agent(agent)
+    elif agent_type == 'ml':
+        actions = agent.decide_batch(totals, dealer, true_counts)
+    elif agent_type == 'rl':
+        from blackjack_gym import observation
+        # Through the same state encoding and greedy choice as BlackjackAgent.do_action
+        actions = [agent.get_action(observation(int(t), bool(s), int(d)), training=False)
+                   for t, s, d in zip(totals, soft, dealer)]
+    else:
+        raise ValueError(f"Unknown agent type: {agent_type}")
+    return PolicyTable(np.asarray(actions, dtype=np.int8).reshape(MAX_TOTAL, 2, DEALER_SLOTS, COUNT_BUCKETS))
+
+
+def compile_rules_agent(agent):
+    """The PolicyTable a RulesAgent plays in its decision mode.
+
+    'table' agents already play one; 'ev' agents get the exact-EV table for
+    their deck count, with each count bucket standing for a shoe at that true
+    count; 'rules' agents get their hand-written strategy with a positive
+    count bucket as 'high-card rich'. The last two approximate the live agent,
+    which sees the exact shoe: see strategy_tables.rules_table for where a
+    'rules' table differs.
+    """
+    if agent.mode == 'table':
+        return PolicyTable(np.array(agent.policy.actions))
+    from strategy_tables import ev_table, rules_table
+    if agent.mode == 'ev':
+        return PolicyTable(ev_table(agent.counter.num_decks))
+    return PolicyTable(rules_table(agent.counter.num_decks))
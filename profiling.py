@@ -0,0 +1,190 @@
+"""Low-overhead latency histograms, phase timers and a sampling profiler for simulation runs.
+
+    python simulation.py --agents rl ml rule --turns 2000 --profile profile.json
+"""
+import json
+import time
+import signal
+import threading
+from collections import Counter
+
+SUB_BUCKET_BITS = 4  # 16 buckets per power of two: about 6% resolution
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_index(ns):
+    """Log-linear bucket of a duration; exact below 2 * SUB_BUCKETS ns."""
+    bits = ns.bit_length()
+    if bits <= SUB_BUCKET_BITS + 1:
+        return ns
+    shift = bits - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (ns >> shift)
+
+
+def bucket_floor(index):
+    """Smallest duration that falls in a bucket."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    return (SUB_BUCKETS + (index & (SUB_BUCKETS - 1))) << shift
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of nanosecond durations with exact count, total and max."""
+    def __init__(self):
+        self.counts = [0] * (64 << SUB_BUCKET_BITS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[bucket_index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, p):
+        """Duration (ns) below which a fraction p of the recorded durations fall, to bucket resolution."""
+        if not self.count:
+            return 0
+        rank = p * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bucket_floor(index + 1), self.max) if index + 1 < len(self.counts) else self.max
+        return self.max
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_us': self.total / max(1, self.count) / 1e3,
+            'p50_us': self.percentile(0.5) / 1e3,
+            'p99_us': self.percentile(0.99) / 1e3,
+            'max_us': self.max / 1e3,
+        }
+
+
+class StackSampler:
+    """Samples the main thread's Python stack every interval seconds of CPU time (SIGPROF).
+
+    Counts, per function, the samples it was executing in (self) and the
+    samples it was anywhere on the stack (inclusive). The handler runs at the
+    next bytecode boundary, so time in a C call is charged to its caller.
+    Where setitimer is unavailable (Windows) or when not started from the
+    main thread, sampling is skipped and the summary says so.
+    """
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = Counter()
+        self.inclusive_counts = Counter()
+        self.available = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+        self._previous_handler = None
+
+    def start(self):
+        if self.available:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        if self.available:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+
+    def _sample(self, signum, frame):
+        self.samples += 1
+        self.self_counts[_describe(frame)] += 1
+        on_stack = set()
+        while frame is not None:
+            on_stack.add(_describe(frame))
+            frame = frame.f_back
+        self.inclusive_counts.update(on_stack)
+
+    def summary(self, top=25):
+        samples = max(1, self.samples)
+        return {
+            'available': self.available,
+            'interval_ms': self.interval * 1e3,
+            'samples': self.samples,
+            'self': [[name, count, count / samples] for name, count in self.self_counts.most_common(top)],
+            'inclusive': [[name, count, count / samples] for name, count in self.inclusive_counts.most_common(top)],
+        }
+
+
+def _describe(frame):
+    code = frame.f_code
+    return f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno}({code.co_name})"
+
+
+class SimulationProfiler:
+    """Per-agent decision latency, dealer and settlement latency, and per-phase time for one run.
+
+    The simulation loop calls record() and add_phase() with perf_counter_ns
+    deltas; with sample_interval set, a StackSampler profiles the run too.
+    """
+    def __init__(self, sample_interval=0.001):
+        self.histograms = {}
+        self.phases = Counter()
+        self.sampler = StackSampler(sample_interval) if sample_interval else None
+        self.started = None
+        self.elapsed = 0.0
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, ns):
+        self.histogram(name).record(ns)
+
+    def add_phase(self, name, ns):
+        self.phases[name] += ns
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.sampler is not None:
+            self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.started
+        return False
+
+    def summary(self):
+        total = sum(self.phases.values())
+        report = {
+            'elapsed_s': self.elapsed,
+            'latency': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            'phases': {name: {'seconds': ns / 1e9, 'share': ns / max(1, total)}
+                       for name, ns in self.phases.most_common()},
+        }
+        if self.sampler is not None:
+            report['profile'] = self.sampler.summary()
+        return report
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print_summary(self, top=10):
+        report = self.summary()
+        print(f"{'latency':<20} {'count':>9} {'p50 us':>9} {'p99 us':>9} {'max us':>10}")
+        for name, row in report['latency'].items():
+            print(f"{name:<20} {row['count']:>9} {row['p50_us']:>9.1f} {row['p99_us']:>9.1f} {row['max_us']:>10.1f}")
+        for name, row in report['phases'].items():
+            print(f"phase {name:<14} {row['seconds']:>8.3f}s {row['share']:>6.1%}")
+        if 'profile' in report:
+            print(f"hottest functions ({report['profile']['samples']} samples):")
+            for name, count, share in report['profile']['self'][:top]:
+                print(f"  {share:>6.1%}  {name}")
@@ -0,0 +1,61 @@
+import numpy as np
+
+Q_SHAPE = (32, 11, 2, 2)  # (player_sum, dealer_card, usable_ace, action)
+
+
+class QTable:
+    """Dense Q-values indexed by (player_sum, dealer_card, usable_ace, action).
+
+    Indexing with an observation tuple returns that state's action values as a
+    view, so `table[obs][action] += x` updates in place. Observations outside
+    the table read as zeros, like unseen states in the old defaultdict.
+    """
+    def __init__(self, values=None):
+        self.values = np.zeros(Q_SHAPE) if values is None else values
+
+    def _index(self, obs):
+        player_sum, dealer_card, usable_ace = obs
+        if 0 <= player_sum < Q_SHAPE[0] and 0 <= dealer_card < Q_SHAPE[1]:
+            return int(player_sum), int(dealer_card), int(usable_ace)
+        return None
+
+    def __getitem__(self, obs):
+        index = self._index(obs)
+        if index is None:
+            return np.zeros(Q_SHAPE[3])
+        return self.values[index]
+
+    def __contains__(self, obs):
+        return self._index(obs) is not None
+
+    def get(self, obs, default=None):
+        index = self._index(obs)
+        return default if index is None else self.values[index]
+
+    def copy(self):
+        """A writable in-memory copy (tables loaded from disk are read-only)."""
+        return QTable(np.array(self.values, dtype=np.float64))
+
+    def save(self, filename):
+        """Writes the values as a .npy file (through a file object, so np.save never renames it)."""
+        with open(filename, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.values, dtype=np.float64))
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Opens a saved table, memory-mapped read-only by default so processes share one copy."""
+        values = np.load(filename, mmap_mode='r' if mmap else None)
+        if values.shape != Q_SHAPE:
+            raise ValueError(f"Unexpected Q-table shape {values.shape} in {filename}")
+        if mmap:
+            return cls(values.view(np.ndarray))  # Plain ndarray view of the mapping; avoids memmap's per-index overhead
+        return cls(values)
+
+    @classmethod
+    def from_dict(cls, q_values):
+        """Converts the legacy {obs: action values} dict."""
+        table = cls()
+        for obs, values in q_values.items():
+            if obs in table:
+                table[obs][:] = values
+        return table
@@ -1,24 +1,33 @@
-from collections import Counter
+from card_counting import CardCounter, card_rank
+from dealer_outcomes import DealerOutcomes, composition, upcard_value
+
+DECISION_MODES = ('rules', 'ev', 'table')
 
 class RulesAgent:
 
-    def __init__(self):
-        # Initialize deck count (Standard single deck)
-        self.deck = Counter({i: 4 for i in range(2, 11)})
-        self.deck.update({'ace': 4})
-        self.deck.update({'jack': 4})
-        self.deck.update({'queen': 4})
-        self.deck.update({'king': 4})
-        self.seen_cards = 0  # Track seen cards
+    def __init__(self, num_decks=1, count_system='hi-lo', mode='rules'):
+        if mode not in DECISION_MODES:
+            raise ValueError(f"Unknown decision mode: {mode}")
+        # Shared counting engine tracks the shoe composition and the count
+        self.counter = CardCounter(num_decks, count_system)
+        self.mode = mode
+        self.dealer_outcomes = DealerOutcomes() if mode == 'ev' else None
+        if mode == 'table':
+            from strategy_tables import load_strategy_tables
+            self.policy = load_strategy_tables().policy(num_decks)  # Memory-mapped, shared by every agent
+
+    @property
+    def deck(self):
+        """Remaining cards per rank."""
+        return self.counter.remaining
+
+    @property
+    def seen_cards(self):
+        return self.counter.seen_cards
 
-    def update_count(self, card_ovr):
-        """Updates the card count when a new card is dealt."""
-        card = card_ovr[1][0]
-        if card not in ['ace', 'jack', 'queen', 'king']:
-            card = int(card)
-        if card in self.deck and self.deck[card] > 0:
-            self.deck[card] -= 1
-        self.seen_cards += 1  # Track seen cards
+    def update_count(self, card):
+        """Updates the card count when a new card (a card code) is dealt."""
+        self.counter.deal(card_rank(card))
 
     def get_cur_deck(self):
         """Returns the current state of the deck (card counts)."""
@@ -26,23 +35,26 @@ class RulesAgent:
 
     def get_true_count(self):
         """Calculates the True Count for card counting strategy."""
-        running_count = 0
-        for card, count in self.deck.items():
-            if card in [2, 3, 4, 5, 6]:
-                running_count += count  # Low cards increase count
-            elif card in [10, 'jack', 'queen', 'king', 'ace']:
-                running_count -= count  # High cards decrease count
+        return self.counter.true_count()
 
-        remaining_cards = sum(self.deck.values())  # Number of remaining cards
-        remaining_decks = max(remaining_cards / 52, 1)  # Avoid division by zero
-
-        return running_count / remaining_decks  # True Count formula
-
-    def decide(self, player_value, dealer_value):
+    def decide(self, player_value, dealer_value, soft=False):
         """Decides whether to Hit or Stand using both basic strategy & card counting."""
-        remaining_high_cards = sum(self.deck[c] for c in [10, 'jack', 'queen', 'king', 'ace'])
-        remaining_low_cards = sum(self.deck[c] for c in range(2, 7))
+        if self.mode == 'ev':
+            return self.ev_decision(player_value, dealer_value, soft)
+        if self.mode == 'table':
+            dealer_value = dealer_value if isinstance(dealer_value, int) else 11
+            return self.policy.decide(player_value, soft, dealer_value, self.counter.true_count())
+        high_card_rich = self.counter.high_remaining > self.counter.low_remaining
+        return self.strategy_decision(player_value, dealer_value, high_card_rich)
+
+    def ev_decision(self, player_value, dealer_value, soft=False):
+        """Hits when that has the higher expected value against the dealer outcomes for the remaining shoe."""
+        counts = composition(self.counter.remaining)
+        stand, hit = self.dealer_outcomes.action_values(player_value, soft, upcard_value(dealer_value), counts)
+        return 1 if hit > stand else 0
 
+    def strategy_decision(self, player_value, dealer_value, high_card_rich):
+        """Basic strategy plus the count deviations, given whether the deck is rich in high cards."""
         if not isinstance(dealer_value, int):
             dealer_value = 11  # Dealer has an ace
             if player_value <= 16:
@@ -56,10 +68,10 @@ class RulesAgent:
         if 13 <= player_value <= 16 and 2 <= dealer_value <= 6: return 0
 
         # Card-counting based strategy
-        if player_value == 16 and dealer_value == 10 and remaining_high_cards > remaining_low_cards:
+        if player_value == 16 and dealer_value == 10 and high_card_rich:
             return 0
         
-        if player_value == 15 and dealer_value == 10 and remaining_high_cards > remaining_low_cards:
+        if player_value == 15 and dealer_value == 10 and high_card_rich:
             return 0
         
         return 1
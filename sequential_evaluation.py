@@ -0,0 +1,160 @@
+"""Evaluate agents only for as many hands as it takes to get a conclusive answer.
+
+    python sequential_evaluation.py --agents rule --precision 0.01        # EV/hand to +-0.01
+    python sequential_evaluation.py --agents rl rule                      # until one is clearly better
+
+Hands are played in chunks, on common cards when several agents are compared
+(see paired_simulation.py). After each chunk the running EV per hand and the
+win/tie/loss rates are checked against their confidence bounds. The run stops
+when every EV is known to within precision, or, when comparing agents, once
+every pairwise difference is either significant or has its whole interval
+inside +-precision (a TOST-style equivalence check); max_hands caps it either
+way.
+
+Looking at the data after every chunk gives a comparison many chances to
+look significant by luck, so the significance test splits the error rate
+across all the checks the run could make (Bonferroni). The precision target
+uses the plain interval.
+"""
+import math
+import argparse
+import itertools
+from shoe import DEFAULT_PENETRATION
+from simulation import AGENT_CLASSES
+from paired_simulation import deal_rounds, load_players, new_outcomes, new_report, play_paired, record_outcome, z_score
+
+
+class SequentialEvaluator:
+    """Stopping rule for a stream of hand results, checked after every chunk of hands."""
+    def __init__(self, precision=0.01, confidence=0.95, chunk=5000, max_hands=500_000):
+        self.precision = precision
+        self.confidence = confidence
+        self.chunk = chunk
+        self.max_hands = max_hands
+        self.z = z_score(confidence)
+        looks = max(1, math.ceil(max_hands / chunk))
+        self.decision_z = z_score(1 - (1 - confidence) / looks)
+
+    def rates(self, data):
+        """Win, tie and loss rates with their confidence intervals."""
+        hands = data['results'].count
+        rates = {}
+        for outcome in ('wins', 'ties', 'losses'):
+            rate = data[outcome] / max(1, hands)
+            margin = self.z * math.sqrt(rate * (1 - rate) / max(1, hands))
+            rates[outcome] = (rate, max(0.0, rate - margin), min(1.0, rate + margin))
+        return rates
+
+    def verdict(self, first, second, stats):
+        """'first', 'second' if that agent is significantly better, 'equal' if the gap is within precision, else None."""
+        low, high = stats.interval(self.decision_z)
+        if low > 0:
+            return first
+        if high < 0:
+            return second
+        # Equivalence needs the whole interval inside +-precision, not just a narrow one around a small gap
+        if stats.count > 1 and -self.precision <= low and high <= self.precision:
+            return 'equal'
+        return None
+
+    def stop_reason(self, report):
+        """Why the run can stop now, or None to keep playing."""
+        hands = max(data['results'].count for data in report['agents'].values())
+        if report['pairs']:
+            verdicts = [self.verdict(first, second, stats) for (first, second), stats in report['pairs'].items()]
+            if all(verdicts):
+                return 'decided'
+        elif all(data['results'].count > 1 and self.z * data['results'].std_error <= self.precision
+                 for data in report['agents'].values()):
+            return 'precision'
+        if hands >= self.max_hands:
+            return 'max_hands'
+        return None
+
+    def summary(self, report, reason):
+        agents = {}
+        for agent_type, data in report['agents'].items():
+            results = data['results']
+            agents[agent_type] = {'hands': results.count, 'ev': results.mean, 'ev_interval': results.interval(self.z),
+                                  **self.rates(data)}
+        pairs = {}
+        for (first, second), stats in report['pairs'].items():
+            pairs[f"{first}-{second}"] = {'delta': stats.mean, 'interval': stats.interval(self.decision_z),
+                                          'verdict': self.verdict(first, second, stats)}
+        hands = max(data['results'].count for data in report['agents'].values())
+        return {'hands': hands, 'reason': reason, 'agents': agents, 'pairs': pairs}
+
+
+def evaluate_agents(players, evaluator=None, num_decks=1, penetration=DEFAULT_PENETRATION, seed=None):
+    """Plays the players on common cards, chunk by chunk, until the evaluator says stop; returns its summary."""
+    evaluator = evaluator or SequentialEvaluator()
+    report = new_report(players)
+    rounds = deal_rounds(None, num_decks, penetration, seed)
+    while True:
+        hands = max(data['results'].count for data in report['agents'].values())
+        play_paired(players, min(evaluator.chunk, evaluator.max_hands - hands), report=report, rounds=rounds)
+        reason = evaluator.stop_reason(report)
+        if reason:
+            return evaluator.summary(report, reason)
+
+
+def gym_episode_returns(agent, env):
+    """Endless greedy-policy episode returns from a gymnasium blackjack environment."""
+    while True:
+        obs, info = env.reset()
+        done = False
+        total_reward = 0
+        while not done:
+            action = agent.get_action(obs, training=False)
+            obs, reward, terminated, truncated, info = env.step(action)
+            total_reward += reward
+            done = terminated or truncated
+        yield total_reward
+
+
+def evaluate_returns(returns, evaluator=None, name='agent'):
+    """Consumes an iterator of per-hand returns, chunk by chunk, until the evaluator says stop; returns its summary."""
+    evaluator = evaluator or SequentialEvaluator()
+    data = new_outcomes()
+    report = {'agents': {name: data}, 'pairs': {}}
+    while True:
+        for result in itertools.islice(returns, min(evaluator.chunk, evaluator.max_hands - data['results'].count)):
+            record_outcome(data, result)
+        reason = evaluator.stop_reason(report)
+        if reason:
+            return evaluator.summary(report, reason)
+
+
+def print_summary(summary):
+    print(f"Stopped after {summary['hands']:,} hands ({summary['reason']})")
+    for agent_type, row in summary['agents'].items():
+        low, high = row['ev_interval']
+        rates = "  ".join(f"{outcome} {row[outcome][0]:.1%} [{row[outcome][1]:.1%}, {row[outcome][2]:.1%}]"
+                          for outcome in ('wins', 'ties', 'losses'))
+        print(f"  {agent_type:<8} EV/hand {row['ev']:+.4f} [{low:+.4f}, {high:+.4f}]  {rates}")
+    for pair, row in summary['pairs'].items():
+        low, high = row['interval']
+        verdict = {None: "undecided", 'equal': "equal within precision"}.get(row['verdict'], f"{row['verdict']} is better")
+        print(f"  {pair:<12} delta {row['delta']:+.4f} [{low:+.4f}, {high:+.4f}]  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate or compare agents until the result is conclusive")
+    parser.add_argument("--agents", nargs="+", default=["rl", "rule"], choices=sorted(AGENT_CLASSES))
+    parser.add_argument("--precision", type=float, default=0.01, help="Target half-width of the EV/hand interval")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--chunk", type=int, default=5000, help="Hands played between checks")
+    parser.add_argument("--max-hands", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in the shoe")
+    parser.add_argument("--penetration", type=float, default=DEFAULT_PENETRATION)
+    parser.add_argument("--compiled", action="store_true", help="Serve every agent from a precompiled policy table")
+    args = parser.parse_args()
+
+    evaluator = SequentialEvaluator(args.precision, args.confidence, args.chunk, args.max_hands)
+    players = load_players(args.agents, args.compiled)
+    print_summary(evaluate_agents(players, evaluator, args.decks, args.penetration, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import random
+from array import array
+from cards import DECK
+
+DEFAULT_PENETRATION = 0.75  # Share of the shoe dealt before the cut card comes out
+
+
+class Shoe:
+    """num_decks decks of card codes in one preallocated int8 array, dealt through an index.
+
+    Drawing is an array read and a pointer bump, and reshuffling permutes the
+    same array in place, so a simulation can deal millions of hands without
+    allocating per card. A cut card sits at penetration of the way through;
+    once it has been dealt, shuffle_if_due() reshuffles between rounds, as at
+    a real table. A round that runs the shoe completely dry reshuffles on the
+    spot; callers that track the count watch `shuffles` to notice.
+
+    pop() and len() make it a drop-in for the old list decks.
+    """
+    def __init__(self, num_decks=1, penetration=DEFAULT_PENETRATION, rng=None):
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}")
+        self.num_decks = num_decks
+        self.penetration = penetration
+        self.cards = array('b', DECK * num_decks)
+        self.size = len(self.cards)
+        self.cut = max(1, int(self.size * penetration))
+        self.rng = random if rng is None else rng  # The random module by default, so random.seed() reproduces runs
+        self.position = 0
+        self.shuffles = 0
+        self.shuffle()
+
+    def shuffle(self):
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        self.shuffles += 1
+
+    def draw(self):
+        if self.position >= self.size:
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    pop = draw
+
+    def take(self, count):
+        """The next count cards as an array, reshuffling first if fewer than that are left."""
+        if self.size - self.position < count:
+            self.shuffle()
+        start = self.position
+        self.position += count
+        return self.cards[start:self.position]
+
+    def shuffle_if_due(self):
+        """Reshuffles if the cut card has come out; returns whether it did."""
+        if self.position >= self.cut:
+            self.shuffle()
+            return True
+        return False
+
+    def __len__(self):
+        return self.size - self.position
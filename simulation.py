@@ -0,0 +1,604 @@
+"""Headless blackjack simulation that never touches pygame.
+
+Agents, NumPy and matplotlib are only imported once a run needs them.
+
+    python simulation.py --agents rl ml rule --turns 500
+"""
+import os
+import copy
+import random
+import sys
+import importlib
+import argparse
+import subprocess
+import time
+from cards import Hand, hand_value
+from shoe import DEFAULT_PENETRATION, Shoe
+
+# Where each agent type is defined; modules are imported on first use
+AGENT_CLASSES = {
+    'rl': ('blackjack_gym', 'BlackjackAgent'),
+    'ml': ('ml_agent', 'MLAgent'),
+    'rule': ('rules_agent', 'RulesAgent'),
+}
+
+# Wall-clock budget for `import simulation` in a fresh interpreter
+IMPORT_BUDGET_SECONDS = 0.1
+
+class Player:
+    def __init__(self, agent, deck, type="rl", policy=None):
+        self.type = type
+        self.deck = deck
+        self.agent = agent
+        self.policy = policy  # Optional compiled PolicyTable that replaces calls into the agent
+        self.hand = Hand((get_random_card(deck), get_random_card(deck)))
+        self.aces = False
+        self.bet = 100
+        self.money = 1000
+        self.message = "Hit (H) or Stand (S)?"
+        self.dealer_hand = None
+        self.turn = True
+        self.bust = False
+        self.game_over = False
+
+    def reset_hand(self, dealer_hand):
+        self.bust = False
+        self.turn = True
+        self.message = "Hit (H) or Stand (S)?"
+        self.game_over = False
+        self.hand = Hand((get_random_card(self.deck), get_random_card(self.deck)))
+        self.dealer_hand = dealer_hand
+
+    def action(self):
+        if self.policy is not None:
+            dealer_value = self.dealer_hand.total
+            true_count = self.agent.get_true_count() if hasattr(self.agent, 'get_true_count') else 0
+            return self.policy.decide(self.hand.total, self.hand.soft, dealer_value, true_count)
+        if self.type == 'rl':
+            return self.agent.do_action((self.hand, self.dealer_hand, self.aces), calculate_hand_value)
+        elif self.type == 'rule':
+            return self.agent.decide(self.hand.total, self.dealer_hand.total, self.hand.soft)
+        elif self.type == 'ml':
+            return self.agent.ml_decision(self.hand.total, self.dealer_hand.total)
+
+
+
+def init_deck(num_decks=1, penetration=DEFAULT_PENETRATION):
+    """A freshly shuffled shoe of num_decks decks, reshuffled between rounds once the cut card is out."""
+    return Shoe(num_decks, penetration)
+
+def get_random_card(deck):
+    """Draw the next card from the shoe (or the end of a list deck, refilled in place when empty)."""
+    if isinstance(deck, Shoe):
+        return deck.draw()
+    if not deck:
+        deck.extend(init_deck().cards)
+    return deck.pop()
+
+def shuffle_if_due(deck):
+    """Reshuffles a shoe whose cut card has come out; called between rounds."""
+    return isinstance(deck, Shoe) and deck.shuffle_if_due()
+
+def calculate_hand_value(hand):
+    if isinstance(hand, Hand):
+        return hand.total  # Kept up to date as cards are added
+    return hand_value(hand)[0]
+
+def hand_state(hand):
+    """Returns the hand's value and whether an ace is still counted as 11."""
+    if isinstance(hand, Hand):
+        return hand.total, hand.soft
+    return hand_value(hand)
+
+def dealer_turn(dealer_hand, deck):
+    while dealer_hand.total < 17:
+        dealer_hand.append(get_random_card(deck))
+        
+def player_turn(player, deck):
+    while player.turn:
+        action = player.action()
+        if action == 1:
+            card = get_random_card(deck)
+            player.hand.append(card)
+            player_value = player.hand.total
+            if player_value == 21: 
+                player.turn = False
+            elif player_value > 21:
+                player.bust = True
+                player.turn = False
+                player.message = "Player busts! Dealer wins!"
+                player.money -= player.bet
+        elif action == 0:
+            player.turn = False
+
+
+def init_player_hands(num_players, deck):
+    player_hands = [Hand((get_random_card(deck), get_random_card(deck))) for _ in range(num_players)]
+    return player_hands
+
+class StreakTracker:
+    """Longest win and loss streaks over a sequence of hands; ties leave the current streak alone.
+
+    Also keeps the opening and closing runs so trackers for consecutive
+    stretches of play can be merged exactly.
+    """
+    def __init__(self):
+        self.max_wins = 0
+        self.max_losses = 0
+        self.first = None  # Outcome ('W' or 'L') of the opening run
+        self.first_length = 0
+        self.last = None  # Outcome of the closing run (the one still in progress)
+        self.last_length = 0
+        self.uniform = True  # Whether every hand so far belongs to one run
+
+    def record(self, outcome):
+        """Adds one decided hand, 'W' for a win or 'L' for a loss."""
+        if self.last is None:
+            self.first, self.first_length = outcome, 1
+            self.last, self.last_length = outcome, 1
+        elif outcome == self.last:
+            self.last_length += 1
+            if self.uniform:
+                self.first_length += 1
+        else:
+            self.last, self.last_length = outcome, 1
+            self.uniform = False
+        self._update_max(outcome, self.last_length)
+
+    def _update_max(self, outcome, length):
+        if outcome == 'W':
+            self.max_wins = max(self.max_wins, length)
+        else:
+            self.max_losses = max(self.max_losses, length)
+
+    def merge(self, other):
+        """Returns the tracker for this stretch of play followed by other's."""
+        if self.last is None or other.last is None:
+            merged = copy.copy(other if self.last is None else self)
+            merged.max_wins = max(self.max_wins, other.max_wins)
+            merged.max_losses = max(self.max_losses, other.max_losses)
+            return merged
+
+        merged = StreakTracker()
+        merged.max_wins = max(self.max_wins, other.max_wins)
+        merged.max_losses = max(self.max_losses, other.max_losses)
+        merged.first, merged.first_length = self.first, self.first_length
+        merged.last, merged.last_length = other.last, other.last_length
+        merged.uniform = False
+        if self.last == other.first:
+            # The closing run of this stretch carries on into the next one
+            bridge = self.last_length + other.first_length
+            merged._update_max(self.last, bridge)
+            if self.uniform:
+                merged.first_length = bridge
+            if other.uniform:
+                merged.last_length = bridge
+            merged.uniform = self.uniform and other.uniform
+        return merged
+
+
+class RunningStats:
+    """Count, mean, variance, min, max and last value of a stream of numbers in O(1) memory (Welford's method).
+
+    merge() combines the stats of two consecutive streams exactly, so shards
+    can be summarized independently.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.last = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.last = value
+
+    def merge(self, other):
+        """Returns the stats of this stream followed by other's."""
+        merged = RunningStats()
+        merged.count = self.count + other.count
+        if merged.count:
+            delta = other.mean - self.mean
+            merged.mean = self.mean + delta * other.count / merged.count
+            merged.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / merged.count
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        merged.last = other.last if other.count else self.last
+        return merged
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_error(self):
+        return (self.variance / self.count) ** 0.5 if self.count else float('inf')
+
+    def interval(self, z=1.96):
+        """Normal-approximation confidence interval for the mean; z=1.96 gives 95%."""
+        margin = z * self.std_error
+        return self.mean - margin, self.mean + margin
+
+
+def new_stats(players):
+    """Empty per-agent accumulators for play_hands."""
+    return {player.type: {
+        'wins': 0, 'busts': 0, 'dealerwin':0, 'turns': 0,
+        'blackjacks': 0, 'final_hand_values': RunningStats(), 'game_durations': RunningStats(),
+        'consecutive_wins': 0, 'consecutive_losses': 0,
+        'ties': 0, 'hit_stay_ratio': RunningStats(), 'restarts': 0, 'money': RunningStats(),
+        'streaks': StreakTracker()
+    } for player in players}
+
+
+def simulate_blackjack(players, deck, num_turns=500, num_tables=None, output="output.csv", plot=False, profile=None,
+                       bankrolls=None, bankroll_every=1, seed=None):
+    """Plays num_turns rounds, writes the stats to output and returns them.
+
+    Memory stays constant in num_turns: the stats are running aggregates,
+    and the bankroll trajectories are only kept if bankrolls names a directory to
+    stream them to (every bankroll_every-th turn; see bankrolls.py).
+
+    profile is an opt-in file path: the run is then timed per decision,
+    dealer turn and settlement, sampled by a stack profiler, and the
+    histograms, phase totals and hottest functions are written there as JSON.
+
+    With num_tables, the batch engine deals from shoes with the same deck
+    count and penetration as deck, seeded with seed.
+    """
+    profiler = None
+    if profile:
+        from profiling import SimulationProfiler
+        profiler = SimulationProfiler()
+    recorder = None
+    if bankrolls:
+        from bankrolls import BankrollRecorder
+        recorder = BankrollRecorder(bankrolls, [player.type for player in players], bankroll_every)
+
+    try:
+        if num_tables:
+            # Play num_tables tables at once on the vectorized NumPy engine
+            from batch_simulation import simulate_blackjack_batch
+            num_decks, penetration = (deck.num_decks, deck.penetration) if isinstance(deck, Shoe) else (1, DEFAULT_PENETRATION)
+            run_batch = lambda: simulate_blackjack_batch(players, num_turns, num_tables, num_decks, seed, recorder, penetration)
+            if profiler is not None:
+                with profiler:  # Only the sampled profile applies; the batch engine has no per-hand path to time
+                    stats = run_batch()
+                profiler.write(profile)
+            else:
+                stats = run_batch()
+        elif profiler is not None:
+            with profiler:
+                stats = finalize_stats(play_hands(players, deck, num_turns, profiler=profiler, bankrolls=recorder))
+            profiler.write(profile)
+            profiler.print_summary()
+        else:
+            stats = finalize_stats(play_hands(players, deck, num_turns, bankrolls=recorder))
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+    write_stats_csv(stats, output)
+    if plot:
+        visualize_stats(stats, bankrolls)
+
+    return stats
+
+def play_hands(players, deck, num_turns, stats=None, profiler=None, bankrolls=None):
+    """Plays num_turns rounds and returns the raw per-agent accumulators (see finalize_stats).
+
+    With a profiling.SimulationProfiler, every decision, dealer turn and
+    settlement is timed into its histograms and phase totals. With a
+    bankrolls.BankrollRecorder, each player's bankroll is recorded every turn.
+    """
+    if stats is None:
+        stats = new_stats(players)
+    bankroll = [0] * len(players)
+
+    timed = profiler is not None
+    clock = time.perf_counter_ns
+    turns = 0
+
+    while turns < num_turns:
+        if timed:
+            phase_start = clock()
+        shuffle_if_due(deck)
+        dealer_hand = Hand((get_random_card(deck),))
+        for player in players:
+            if player.money <= 0:
+                player.money = 1000  # Reset player's money
+                stats[player.type]['restarts'] += 1
+            player.reset_hand(dealer_hand)
+        if timed:
+            now = clock()
+            profiler.add_phase('deal', now - phase_start)
+            phase_start = now
+            decided = 0  # Decision time this round, kept out of the player_turns phase
+
+        turns += 1
+        for player in players:
+          
+            hits = 0
+            stays = 0
+            while player.turn and not player.bust:
+                if timed:
+                    start = clock()
+                    action = player.action()
+                    elapsed = clock() - start
+                    profiler.record(player.type, elapsed)
+                    decided += elapsed
+                else:
+                    action = player.action()
+                if action == 1:  # Hit
+                    hits += 1
+                    card = get_random_card(deck)
+                    player.hand.append(card)
+                    if player.hand.total > 21:
+                        player.bust = True
+                        stats[player.type]['busts'] += 1
+                        player.money -= player.bet
+                        stats[player.type]['streaks'].record('L')
+                elif action == 0:  # Stay
+                    stays += 1
+                    player.turn = False
+
+            stats[player.type]['hit_stay_ratio'].add(hits / max(1, stays))
+
+        if timed:
+            now = clock()
+            profiler.add_phase('decisions', decided)
+            profiler.add_phase('player_turns', now - phase_start - decided)
+            phase_start = now
+
+        # Dealer's turn
+        dealer_turn(dealer_hand, deck)
+        dealer_value = dealer_hand.total
+        if timed:
+            now = clock()
+            profiler.record('dealer', now - phase_start)
+            profiler.add_phase('dealer', now - phase_start)
+            phase_start = now
+
+        for player in players:
+            stats[player.type]['turns'] += 1
+            stats[player.type]['game_durations'].add(1)
+
+            if player.bust:
+                continue
+
+            player_value = player.hand.total
+            stats[player.type]['final_hand_values'].add(player_value)
+            # stats[player.type]['net_money'] += player.money
+
+            if player.hand.blackjack:
+                stats[player.type]['blackjacks'] += 1
+
+            if dealer_value > 21 or dealer_value < player_value:
+                stats[player.type]['wins'] += 1
+                stats[player.type]['streaks'].record('W')
+                player.money += player.bet
+            elif dealer_value > player_value:
+                stats[player.type]['dealerwin'] += 1
+                stats[player.type]['streaks'].record('L')
+                player.money -= player.bet
+            else:  # Tie scenario
+                stats[player.type]['ties'] += 1
+
+        # Bankrolls are sampled once the round has settled
+        for i, player in enumerate(players):
+            stats[player.type]['money'].add(player.money)
+            bankroll[i] = player.money
+        if bankrolls is not None:
+            bankrolls.record(bankroll)
+        if timed:
+            elapsed = clock() - phase_start
+            profiler.record('settle', elapsed)
+            profiler.add_phase('settle', elapsed)
+
+    return stats
+
+def merge_stats(first, second):
+    """Combines raw accumulators from two consecutive stretches of play, in order."""
+    merged = {}
+    for player_type, data in first.items():
+        other = second[player_type]
+        merged[player_type] = {key: (value.merge(other[key]) if hasattr(value, 'merge') else value + other[key])
+                               for key, value in data.items()}
+    return merged
+
+def finalize_stats(stats):
+    """Turns raw accumulators into the per-agent averages, bankroll summary and streaks that get reported."""
+    for player_type, data in stats.items():
+        streaks = data.pop('streaks')
+        data['consecutive_wins'] = streaks.max_wins
+        data['consecutive_losses'] = streaks.max_losses
+        for key in ('final_hand_values', 'game_durations', 'hit_stay_ratio'):
+            data[key] = data[key].mean
+        money = data.pop('money')
+        data.update(money_summary(money))
+    return stats
+
+def money_summary(money):
+    """Report columns for a RunningStats of bankrolls."""
+    return {'money_mean': money.mean, 'money_std': money.variance ** 0.5,
+            'money_min': money.min, 'money_max': money.max, 'money_final': money.last}
+
+def write_stats_csv(stats, filename="output.csv"):
+    import csv
+
+    # Get the fieldnames (keys of the stats dictionary, which are player statistics)
+    fieldnames = list(next(iter(stats.values())).keys())
+
+    # Write to the CSV file
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        
+        # Write the header
+        writer.writeheader()
+
+        # Write the rows for each player (rl, ml, rule)
+        for player_type, data in stats.items():
+            # Flatten the data and write to the CSV
+            row = {key: data[key] for key in fieldnames}
+            writer.writerow(row)
+
+    print(f"CSV file '{filename}' created successfully.")
+
+
+def visualize_stats(stats, bankrolls=None):
+    import matplotlib.pyplot as plt
+
+    # Assuming 'stats' contains the data as provided
+
+    # Create a figure with four subplots (2 rows, 2 columns)
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(10, 8))
+
+    # Plot 1: Change of Money Over Time (Line plot), from the recorded trajectories if there are any
+    if bankrolls:
+        from bankrolls import load_bankrolls
+        trajectories, turns = load_bankrolls(bankrolls)
+        for player_type, money in trajectories.items():
+            ax1.plot(turns, money, label=f'{player_type} Money')
+    else:
+        for player_type, data in stats.items():
+            ax1.errorbar([player_type], [data['money_mean']],
+                         yerr=[[data['money_mean'] - data['money_min']], [data['money_max'] - data['money_mean']]],
+                         fmt='o', capsize=5, label=f'{player_type} Money (mean, min-max)')
+
+    # Set labels and title for the first plot
+    ax1.set_xlabel('Turns' if bankrolls else 'Player Type')
+    ax1.set_ylabel('Money')
+    ax1.set_title('Change of Money Over Time' if bankrolls else 'Money Range Over the Run')
+    ax1.legend()
+
+    # Plot 2: Number of Resets (Bar plot)
+    player_types = list(stats.keys())
+    resets = [data['restarts'] for data in stats.values()]
+
+    ax2.bar(player_types, resets, color='tab:orange')
+
+    # Set labels and title for the second plot
+    ax2.set_xlabel('Player Type')
+    ax2.set_ylabel('Number of Resets')
+    ax2.set_title('Number of Resets for Each Player')
+
+    # Plot 3: Win Ratio (Bar plot)
+    win_ratios = [data['wins']/data['turns'] for data in stats.values()]
+
+    ax3.bar(player_types, win_ratios, color='tab:blue')
+
+    # Set labels and title for the third plot
+    ax3.set_xlabel('Player Type')
+    ax3.set_ylabel('Win Ratio')
+    ax3.set_title('Win Ratio for Each Player')
+
+    # Plot 4: Hit-Stay Ratio (Bar plot)
+    hit_stay_ratios = [data['hit_stay_ratio'] for data in stats.values()]
+
+    ax4.bar(player_types, hit_stay_ratios, color='tab:green')
+
+    # Set labels and title for the fourth plot
+    ax4.set_xlabel('Player Type')
+    ax4.set_ylabel('Hit-Stay Ratio')
+    ax4.set_title('Hit-Stay Ratio for Each Player')
+
+    # Show the plots
+    plt.tight_layout()  # Adjust layout to avoid overlap
+    plt.show()
+
+
+def load_agent(agent_type):
+    """Imports and constructs the agent for a player type ('rl', 'ml' or 'rule')."""
+    module_name, class_name = AGENT_CLASSES[agent_type]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)()
+
+
+def check_import_budget(budget=IMPORT_BUDGET_SECONDS):
+    """Times `import simulation` in a fresh interpreter and checks it stays headless and within budget."""
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import simulation\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(m for m in ('pygame', 'matplotlib', 'gymnasium', 'tqdm', 'pandas', 'numpy') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed, heavy = (result.stdout.split('\n') + [''])[:2]
+    elapsed = float(elapsed)
+    print(f"import simulation: {elapsed * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+    if heavy:
+        print(f"Heavy modules imported at startup: {heavy}")
+    return elapsed <= budget and not heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run blackjack agent simulations without a display.")
+    parser.add_argument("--agents", nargs="+", default=["rl", "ml", "rule"], choices=sorted(AGENT_CLASSES))
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--tables", type=int, default=None, help="Run this many tables at once on the NumPy batch engine")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in the shoe")
+    parser.add_argument("--penetration", type=float, default=DEFAULT_PENETRATION,
+                        help="Share of the shoe dealt before the cut card forces a reshuffle")
+    parser.add_argument("--workers", type=int, default=None, help="Split the turns across this many processes")
+    parser.add_argument("--output", default="output.csv")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="Play in chunks until every EV/hand (or, with several agents, every comparison) is settled "
+                             "to this precision, with --turns as the cap")
+    parser.add_argument("--paired", action="store_true",
+                        help="Play every agent on the same cards and report paired differences with confidence intervals")
+    parser.add_argument("--compiled", action="store_true", help="Serve every agent from a precompiled policy table")
+    parser.add_argument("--plot", action="store_true", help="Plot the stats with matplotlib at the end")
+    parser.add_argument("--bankrolls", default=None, metavar="DIR",
+                        help="Stream every player's bankroll trajectory to Parquet files in directory DIR (see bankrolls.py)")
+    parser.add_argument("--bankroll-every", type=int, default=1, help="Record the bankrolls only every N turns")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="Time decisions, dealer turns and settlements, sample a profile, and write both to FILE")
+    parser.add_argument("--check-import-budget", action="store_true",
+                        help="Only measure the import time of this module and exit non-zero if over budget")
+    args = parser.parse_args()
+
+    if args.check_import_budget:
+        sys.exit(0 if check_import_budget() else 1)
+
+    if args.precision is not None:
+        from paired_simulation import load_players
+        from sequential_evaluation import SequentialEvaluator, evaluate_agents, print_summary
+        evaluator = SequentialEvaluator(args.precision, chunk=min(5000, args.turns), max_hands=args.turns)
+        players = load_players(args.agents, args.compiled)
+        print_summary(evaluate_agents(players, evaluator, args.decks, args.penetration, args.seed))
+        return
+
+    if args.paired:
+        from paired_simulation import simulate_paired
+        simulate_paired(args.agents, args.turns, args.seed, args.decks, args.penetration, args.compiled)
+        return
+
+    if args.workers:
+        from parallel_simulation import simulate_sharded
+        simulate_sharded(args.agents, args.turns, args.workers, args.seed or 0, args.compiled, args.output, args.plot,
+                         args.decks, args.penetration, args.bankrolls, args.bankroll_every)
+        return
+
+    random.seed(args.seed)
+    deck = init_deck(args.decks, args.penetration)
+    players = [Player(load_agent(agent_type), deck, agent_type) for agent_type in args.agents]
+    if args.compiled:
+        from policy_table import compile_policy
+        for player in players:
+            player.policy = compile_policy(player.agent, player.type)
+    simulate_blackjack(players, deck, args.turns, args.tables, args.output, args.plot, args.profile,
+                       args.bankrolls, args.bankroll_every, args.seed)
+
+
+if __name__ == "__main__":
+    main()
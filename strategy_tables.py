@@ -0,0 +1,140 @@
+"""Offline hit/stand strategy tables for every true-count bucket and deck count.
+
+    python strategy_tables.py                 # exact-EV tables for 1, 2, 4, 6 and 8 decks
+    python strategy_tables.py --method rules  # RulesAgent's hand-written rules, for comparison
+
+Each deck count's table is a .npy file in one directory, saved and memory-
+mapped through PolicyTable, so a live decision is a single array read and
+every process on a host shares the same page-cached copy.
+"""
+import os
+import re
+import glob
+import argparse
+import numpy as np
+from policy_table import PolicyTable, MAX_TOTAL, DEALER_SLOTS, MIN_COUNT, MAX_COUNT, COUNT_BUCKETS
+from dealer_outcomes import DealerOutcomes, FULL_DECK
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STRATEGY_TABLES = os.path.join(BASE_DIR, "strategy_tables")  # Holds decks_<n>.npy per deck count
+DECK_COUNTS = (1, 2, 4, 6, 8)
+TABLE_SHAPE = (MAX_TOTAL, 2, DEALER_SLOTS, COUNT_BUCKETS)
+
+# Hi-Lo groups used to shift a shoe to a given true count (composition slots: 1 = ace .. 10 = tens)
+LOW_VALUES = (2, 3, 4, 5, 6)
+HIGH_VALUES = (1, 10)
+
+
+def count_composition(num_decks, true_count):
+    """A num_decks shoe whose Hi-Lo true count is true_count.
+
+    A positive count removes round(true_count * num_decks) low cards spread
+    evenly over 2-6; a negative one removes that many high cards in
+    proportion to their share of the shoe.
+    """
+    counts = [count * num_decks for count in FULL_DECK]
+    removed = round(abs(true_count) * num_decks)
+    values = LOW_VALUES if true_count > 0 else HIGH_VALUES
+    weights = np.array([counts[value - 1] for value in values], dtype=np.float64)
+    share = removed * weights / weights.sum()
+    taken = np.floor(share).astype(int)
+    # Largest remainders get the cards left over after rounding down
+    for i in np.argsort(taken - share)[:removed - taken.sum()]:
+        taken[i] += 1
+    for value, take in zip(values, taken):
+        counts[value - 1] -= int(take)
+    return tuple(counts)
+
+
+def ev_table(num_decks):
+    """Hit/stand actions that maximize expected value for each count bucket of a num_decks shoe."""
+    actions = np.zeros(TABLE_SHAPE, dtype=np.int8)
+    actions[:12] = 1  # Hitting can never bust below 12
+    for bucket, true_count in enumerate(range(MIN_COUNT, MAX_COUNT + 1)):
+        counts = count_composition(num_decks, true_count)
+        engine = DealerOutcomes(resolution=None)  # Offline, so exact
+        for dealer_value in range(2, 12):
+            upcard = 1 if dealer_value == 11 else dealer_value
+            for total in range(12, 22):
+                for soft in (0, 1):
+                    stand, hit = engine.action_values(total, bool(soft), upcard, counts)
+                    actions[total, soft, dealer_value, bucket] = hit > stand
+    actions[:, :, :2] = actions[:, :, 11:12]  # Dealer slots 0 and 1 also mean an ace
+    return actions
+
+
+def rules_table(num_decks):
+    """RulesAgent's hand-written strategy, with 'high-card rich' meaning a positive count bucket.
+
+    Live, a RulesAgent is high-card rich whenever more high than low cards
+    remain, i.e. at any positive Hi-Lo count. A bucket only knows the count
+    rounded to an integer, so true counts between 0 and 0.5 play as neutral
+    here (standing less on 15 and 16 against a 10) and the table can differ
+    from the live agent there; other count systems differ more.
+    """
+    from policy_table import state_grid
+    from rules_agent import RulesAgent
+    agent = RulesAgent(num_decks)
+    totals, soft, dealer, true_counts = state_grid()
+    actions = [agent.strategy_decision(int(t), int(d), c > 0) for t, d, c in zip(totals, dealer, true_counts)]
+    return np.asarray(actions, dtype=np.int8).reshape(TABLE_SHAPE)
+
+
+def table_path(directory, num_decks):
+    return os.path.join(directory, f"decks_{num_decks}.npy")
+
+
+def generate(directory=STRATEGY_TABLES, deck_counts=DECK_COUNTS, method='ev'):
+    """Builds the table for every deck count and saves each to its own file in directory."""
+    build = ev_table if method == 'ev' else rules_table
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for num_decks in deck_counts:
+        tables[num_decks] = PolicyTable(build(num_decks))
+        tables[num_decks].save(table_path(directory, num_decks))
+    return tables
+
+
+class StrategyTables:
+    """Read-only, memory-mapped strategy tables, one PolicyTable per deck count."""
+    def __init__(self, tables):
+        self.tables = dict(sorted(tables.items()))
+        self.deck_counts = tuple(self.tables)
+
+    @classmethod
+    def load(cls, directory=STRATEGY_TABLES):
+        tables = {}
+        for path in glob.glob(table_path(glob.escape(directory), '*')):
+            match = re.fullmatch(r"decks_(\d+)\.npy", os.path.basename(path))
+            if match:
+                tables[int(match.group(1))] = PolicyTable.load(path)
+        if not tables:
+            raise FileNotFoundError(f"No strategy tables in {directory}; run python strategy_tables.py")
+        for num_decks, table in tables.items():
+            if table.actions.shape != TABLE_SHAPE:
+                raise ValueError(f"Unexpected table shape {table.actions.shape} for {num_decks} decks in {directory}")
+        return cls(tables)
+
+    def policy(self, num_decks):
+        """The table for num_decks, or for the closest deck count there is."""
+        return self.tables[min(self.deck_counts, key=lambda count: abs(count - num_decks))]
+
+
+_loaded = {}
+
+def load_strategy_tables(directory=STRATEGY_TABLES):
+    """Maps the strategy tables once per process and shares them between agents."""
+    if directory not in _loaded:
+        _loaded[directory] = StrategyTables.load(directory)
+    return _loaded[directory]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate count-indexed hit/stand strategy tables")
+    parser.add_argument("--output", default=STRATEGY_TABLES)
+    parser.add_argument("--decks", nargs="+", type=int, default=list(DECK_COUNTS))
+    parser.add_argument("--method", choices=["ev", "rules"], default="ev")
+    args = parser.parse_args()
+    tables = generate(args.output, args.decks, args.method)
+    size = sum(table.actions.nbytes for table in tables.values())
+    print(f"Wrote {len(tables)} x {COUNT_BUCKETS} count buckets ({size:,} bytes) to {args.output}")
@@ -0,0 +1,137 @@
+import time
+import numpy as np
+
+# One fixed-size record per snapshot, appended to the telemetry file
+SNAPSHOT_DTYPE = np.dtype([
+    ('episodes', '<i8'),
+    ('td_mean', '<f8'), ('td_var', '<f8'),
+    ('td_rolling_mean', '<f8'), ('td_rolling_var', '<f8'),
+    ('epsilon', '<f8'),
+    ('return_mean', '<f8'),
+    ('episodes_per_sec', '<f8'),
+    ('time', '<f8'),
+])
+
+
+class RingBuffer:
+    """Fixed-capacity float buffer that keeps the most recent values."""
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity)
+        self.capacity = capacity
+        self.size = 0
+        self.start = 0
+
+    def push(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))[-self.capacity:]
+        end = (self.start + self.size) % self.capacity
+        first = min(values.size, self.capacity - end)
+        self.data[end:end + first] = values[:first]
+        self.data[:values.size - first] = values[first:]
+        overflow = max(0, self.size + values.size - self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+        self.size = min(self.capacity, self.size + values.size)
+
+    def append(self, value):
+        """Pushes a single value without any array allocation."""
+        self.data[(self.start + self.size) % self.capacity] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def values(self):
+        """Contents, oldest first."""
+        return np.roll(self.data, -self.start)[:self.size]
+
+
+class TrainingTelemetry:
+    """Constant-memory training statistics.
+
+    Keeps an exact running mean and variance of every TD error (Welford,
+    merged batch by batch), rolling statistics over the last `window` TD
+    errors and episode returns, the current epsilon and episodes/sec, and a
+    bounded history of the rolling TD error for plotting. Optionally
+    appends a SNAPSHOT_DTYPE record to snapshot_path every snapshot_every
+    episodes.
+    """
+    def __init__(self, window=500, history=10_000, sample_every=100, snapshot_path=None, snapshot_every=10_000):
+        self.td_count = 0
+        self.td_mean = 0.0
+        self.td_m2 = 0.0
+        self.td_window = RingBuffer(window)
+        self.returns = RingBuffer(window)
+        self.history_episodes = RingBuffer(history)
+        self.history_td = RingBuffer(history)
+        self.sample_every = sample_every
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.episodes = 0
+        self.start_episodes = 0  # Episodes already trained when this run started
+        self.epsilon = None
+        self.started = time.perf_counter()
+
+    def resume(self, episodes):
+        """Continues the episode count from a checkpoint that had already trained on episodes."""
+        self.episodes = self.start_episodes = episodes
+        self.started = time.perf_counter()
+
+    def record_td(self, temporal_difference):
+        """Adds one TD error or an array of them."""
+        if isinstance(temporal_difference, (float, int, np.floating)):
+            # Scalar Welford step for the one-transition-at-a-time trainer
+            value = float(temporal_difference)
+            self.td_count += 1
+            delta = value - self.td_mean
+            self.td_mean += delta / self.td_count
+            self.td_m2 += delta * (value - self.td_mean)
+            self.td_window.append(value)
+            return
+        values = np.atleast_1d(np.asarray(temporal_difference, dtype=np.float64))
+        count = values.size
+        if not count:
+            return
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        total = self.td_count + count
+        delta = batch_mean - self.td_mean
+        self.td_mean += delta * count / total
+        self.td_m2 += batch_m2 + delta ** 2 * self.td_count * count / total
+        self.td_count = total
+        self.td_window.push(values)
+
+    def record_episodes(self, episode_returns, epsilon):
+        """Adds the returns of one or more finished episodes and the epsilon they ended on."""
+        episode_returns = np.atleast_1d(np.asarray(episode_returns, dtype=np.float64))
+        before = self.episodes
+        self.episodes += episode_returns.size
+        self.epsilon = epsilon
+        self.returns.push(episode_returns)
+        if self.episodes // self.sample_every > before // self.sample_every:
+            self.history_episodes.push(self.episodes)
+            self.history_td.push(self.td_window.values().mean() if self.td_window.size else 0.0)
+        if self.snapshot_path and self.episodes // self.snapshot_every > before // self.snapshot_every:
+            self.snapshot()
+
+    def summary(self):
+        """Current statistics as a SNAPSHOT_DTYPE record."""
+        recent_td = self.td_window.values()
+        recent_returns = self.returns.values()
+        elapsed = time.perf_counter() - self.started
+        return np.array((
+            self.episodes,
+            self.td_mean, self.td_m2 / max(1, self.td_count - 1),
+            recent_td.mean() if recent_td.size else 0.0, recent_td.var(ddof=1) if recent_td.size > 1 else 0.0,
+            np.nan if self.epsilon is None else self.epsilon,
+            recent_returns.mean() if recent_returns.size else 0.0,
+            (self.episodes - self.start_episodes) / max(elapsed, 1e-9),
+            time.time(),
+        ), dtype=SNAPSHOT_DTYPE)
+
+    def snapshot(self):
+        with open(self.snapshot_path, 'ab') as f:
+            f.write(self.summary().tobytes())
+
+
+def load_snapshots(path):
+    """Reads every snapshot record appended to a telemetry file."""
+    return np.fromfile(path, dtype=SNAPSHOT_DTYPE)